@@ -0,0 +1,276 @@
+"""
+Ministry Analytics for Salmeen Platform
+Pre-aggregated date x location x violation cube and city-wide KPIs
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+from cache import TTLCache
+from model import SafetyScoreCalculator, aggregate_driver_stats, merge_driver_stats
+from spatial import GridIndex
+from utils import NO_VIOLATION
+
+
+class ViolationCube:
+    """Materialized date x location_name x violation_type aggregates"""
+
+    MEASURES = ["records", "speeding", "speed_sum", "speed_sq_sum"]
+
+    def __init__(self):
+        self.origin = None
+        self.locations = []
+        self.violation_types = []
+        # measures x days x locations x violation types
+        self._data = np.zeros((len(self.MEASURES), 0, 0, 0))
+        # Cumulative sums over days, valid up to self._prefix_valid
+        self._prefix = self._data.copy()
+        self._prefix_valid = 0
+
+    def append(self, df):
+        """
+        Fold new driving logs into the cube
+
+        Args:
+            df (pd.DataFrame): Driving logs with date, location_name,
+                violation_type, speed_kmh and speed_limit
+        """
+        if len(df) == 0:
+            return
+
+        days = pd.to_datetime(df["date"]).to_numpy().astype("datetime64[D]")
+        if self.origin is None:
+            self.origin = days.min()
+        if days.min() < self.origin:
+            self._prepend_days(int((self.origin - days.min()).astype(int)))
+            self.origin = days.min()
+        day_idx = (days - self.origin).astype(np.int64)
+
+        location_idx = self._encode(df["location_name"], self.locations)
+        violation_idx = self._encode(df["violation_type"], self.violation_types)
+        n_days = max(self._data.shape[1], int(day_idx.max()) + 1)
+        self._grow(n_days, len(self.locations), len(self.violation_types))
+
+        _, n_days, n_locations, n_violations = self._data.shape
+        flat = (day_idx * n_locations + location_idx) * n_violations + violation_idx
+        speed = df["speed_kmh"].to_numpy(dtype="float64")
+        weights = [
+            None,
+            (df["speed_kmh"] > df["speed_limit"]).to_numpy(dtype="float64"),
+            speed,
+            speed ** 2,
+        ]
+        size = n_days * n_locations * n_violations
+        for measure, weight in enumerate(weights):
+            counts = np.bincount(flat, weights=weight, minlength=size)
+            self._data[measure] += counts.reshape(n_days, n_locations, n_violations)
+
+        self._prefix_valid = min(self._prefix_valid, int(day_idx.min()))
+
+    def rollup(self, start_date, end_date, by=("location_name",), include_clean=False):
+        """
+        Aggregate measures over a date range in time independent of log volume
+
+        Args:
+            start_date (str): First day of the range (inclusive)
+            end_date (str): Last day of the range (inclusive)
+            by (tuple): Dimensions to keep: "location_name", "violation_type"
+            include_clean (bool): Also count records without a violation
+
+        Returns:
+            pd.DataFrame: records, speeding, avg_speed and speed_std per group
+        """
+        totals = self._range_totals(start_date, end_date)
+        if not include_clean and NO_VIOLATION in self.violation_types:
+            totals[:, :, self.violation_types.index(NO_VIOLATION)] = 0
+
+        levels = []
+        for axis, dim, labels in [(1, "location_name", self.locations),
+                                  (2, "violation_type", self.violation_types)]:
+            if dim in by:
+                levels.append(labels)
+            else:
+                totals = totals.sum(axis=axis, keepdims=True)
+                levels.append(["all"])
+        index = pd.MultiIndex.from_product(levels, names=["location_name", "violation_type"])
+
+        result = pd.DataFrame(totals.reshape(len(self.MEASURES), -1).T, index=index, columns=self.MEASURES)
+        if len(by) == 1:
+            result = result.droplevel(1 if by[0] == "location_name" else 0)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result["avg_speed"] = result["speed_sum"] / result["records"]
+            variance = result["speed_sq_sum"] / result["records"] - result["avg_speed"] ** 2
+            result["speed_std"] = np.sqrt(variance.clip(lower=0))
+
+        result[["records", "speeding"]] = result[["records", "speeding"]].astype("int64")
+        return result.drop(columns=["speed_sum", "speed_sq_sum"])
+
+    def period(self, date, period="day", **kwargs):
+        """
+        Roll up the day, week (Sunday to Saturday) or month containing a date
+
+        Args:
+            date (str): Any day inside the period
+            period (str): "day", "week" or "month"
+            **kwargs: Passed to rollup
+
+        Returns:
+            pd.DataFrame: Rollup for the period
+        """
+        day = pd.Timestamp(date).normalize()
+        if period == "day":
+            start, end = day, day
+        elif period == "week":
+            start = day - pd.Timedelta(days=(day.dayofweek + 1) % 7)
+            end = start + pd.Timedelta(days=6)
+        elif period == "month":
+            start = day.replace(day=1)
+            end = start + pd.offsets.MonthEnd(0)
+        else:
+            raise ValueError(f"Unknown period: {period}")
+        return self.rollup(start, end, **kwargs)
+
+    @property
+    def last_date(self):
+        """Most recent day held in the cube, or None when empty"""
+        if self.origin is None:
+            return None
+        return pd.Timestamp(self.origin + np.timedelta64(self._data.shape[1] - 1, "D"))
+
+    def _range_totals(self, start_date, end_date):
+        _, n_days, n_locations, n_violations = self._data.shape
+        empty = np.zeros((len(self.MEASURES), n_locations, n_violations))
+        if self.origin is None:
+            return empty
+
+        start = int((np.datetime64(pd.Timestamp(start_date), "D") - self.origin).astype(int))
+        end = int((np.datetime64(pd.Timestamp(end_date), "D") - self.origin).astype(int))
+        start, end = max(start, 0), min(end, n_days - 1)
+        if start > end:
+            return empty
+
+        prefix = self._cumulative()
+        totals = prefix[:, end].copy()
+        if start > 0:
+            totals -= prefix[:, start - 1]
+        return totals
+
+    def _cumulative(self):
+        """Bring the running day sums up to date from the earliest changed day"""
+        n_days = self._data.shape[1]
+        if self._prefix_valid < n_days:
+            first = self._prefix_valid
+            self._prefix[:, first:] = np.cumsum(self._data[:, first:], axis=1)
+            if first > 0:
+                self._prefix[:, first:] += self._prefix[:, first - 1:first]
+            self._prefix_valid = n_days
+        return self._prefix
+
+    def _encode(self, values, labels):
+        """Map values to positions in labels, appending unseen labels"""
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        for label in uniques:
+            if label not in labels:
+                labels.append(label)
+        positions = np.array([labels.index(label) for label in uniques], dtype=np.int64)
+        return positions[codes]
+
+    def _grow(self, n_days, n_locations, n_violations):
+        measures, days, locations, violations = self._data.shape
+        if (days, locations, violations) == (n_days, n_locations, n_violations):
+            return
+        data = np.zeros((measures, n_days, n_locations, n_violations))
+        data[:, :days, :locations, :violations] = self._data
+        self._data = data
+        self._prefix = np.zeros_like(data)
+        self._prefix_valid = 0
+
+    def _prepend_days(self, n_days):
+        padding = np.zeros((self._data.shape[0], n_days) + self._data.shape[2:])
+        self._data = np.concatenate([padding, self._data], axis=1)
+        self._prefix = np.zeros_like(self._data)
+        self._prefix_valid = 0
+
+
+class CityAnalytics:
+    """
+    City-wide ministry KPIs computed from the driving logs, cached with a TTL
+
+    The logs are treated as append-only: each refresh folds only the rows
+    added since the previous one into copies of the cube, grid index and
+    driver statistics, so snapshots already handed out never change. If
+    the logs shrink they were rewritten, and everything is rebuilt.
+    """
+
+    def __init__(self, load_logs, model_accuracy=None, ttl=300):
+        """
+        Args:
+            load_logs (callable): Returns the current driving logs (CSV or LogStore)
+            model_accuracy (float): Held-out accuracy of the deployed model (0-1)
+            ttl (float): Seconds before KPIs are recomputed from the logs
+        """
+        self.load_logs = load_logs
+        self.model_accuracy = model_accuracy
+        self.calculator = SafetyScoreCalculator()
+        self._cache = TTLCache(ttl)
+        self._rows_seen = 0
+        self._cube = ViolationCube()
+        self._grid = GridIndex()
+        self._driver_stats = None
+
+    def snapshot(self):
+        """
+        Current dashboard figures; a cache hit until the TTL expires
+
+        Returns:
+            dict: KPIs plus the cube and grid index they were computed from
+        """
+        return self._cache.get_or_compute("snapshot", self._compute)
+
+    def refresh(self):
+        """Force the next snapshot() to recompute from the logs"""
+        self._cache.invalidate()
+
+    def _compute(self):
+        logs = self.load_logs()
+        if len(logs) < self._rows_seen:
+            self._rows_seen = 0
+            self._cube, self._grid, self._driver_stats = ViolationCube(), GridIndex(), None
+        new_logs = logs.iloc[self._rows_seen:]
+
+        # Copy-on-write: readers of the previous snapshot keep their objects
+        cube = copy.deepcopy(self._cube)
+        cube.append(new_logs)
+        grid = copy.deepcopy(self._grid)
+        if len(new_logs):
+            grid.add(new_logs)
+
+        # City safety: mean driver score when drivers are identified, else
+        # the score of the whole city's logs taken as one driver
+        by = "driver_id" if "driver_id" in logs.columns else pd.Series(0, index=new_logs.index)
+        driver_stats = merge_driver_stats(self._driver_stats, aggregate_driver_stats(new_logs, by))
+        self._cube, self._grid, self._driver_stats = cube, grid, driver_stats
+        self._rows_seen = len(logs)
+
+        today = cube.last_date
+        total_violations = 0
+        if today is not None:
+            total_violations = int(cube.period(today, "day", by=())["records"].iloc[0])
+
+        if len(driver_stats):
+            city_safety = self.calculator.calculate_scores(stats=driver_stats)["score"].mean()
+        else:
+            city_safety = self.calculator.base_score
+
+        return {
+            "total_violations": total_violations,
+            "city_safety": int(round(city_safety)),
+            "ai_accuracy": None if self.model_accuracy is None else round(self.model_accuracy * 100, 1),
+            "risk_zones": len(grid.risk_zones()),
+            "last_date": today,
+            "cube": cube,
+            "grid": grid,
+        }
@@ -1,11 +1,18 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import os
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
 import time
+import uuid
+
+from model import (
+    CITIZEN_FEATURES, CitizenPredictionTable, load_artifact, save_artifact, train_citizen_model
+)
+from analytics import CityAnalytics
+from live_store import LiveStatusStore, SQLiteStatusStore
+from sql_store import LogDatabase
+import instrumentation
+from instrumentation import section
+from utils import VIOLATION_TYPES, load_driving_data
 
 # --- 1. إعدادات الصفحة والتصميم ---
 st.set_page_config(
@@ -15,6 +22,12 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# Hidden debug panel (?debug=1) times this session's reruns only;
+# SALMEEN_INSTRUMENT=1 times every session
+DEBUG_PANEL = st.query_params.get("debug") == "1"
+instrumentation.enable_thread(DEBUG_PANEL)
+rerun_start = time.perf_counter()
+
 # Custom CSS
 st.markdown("""
     <style>
@@ -109,36 +122,57 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- 2. إدارة الحالة المشتركة (The Bridge) ---
-# هنا نربط بين المواطن والوزارة
-if 'user_status' not in st.session_state:
-    st.session_state['user_status'] = {
-        'score': 85,
-        'risk_level': 0, # 0:Safe, 1:Medium, 2:High
-        'last_updated': 'الآن'
-    }
+# هنا نربط بين المواطن والوزارة: كل جلسة مواطن تنشر حالتها في مخزن مشترك
+# على مستوى العملية، ولوحة الوزارة تقرأ المجموع الحي لكل المستخدمين
+if 'session_id' not in st.session_state:
+    st.session_state['session_id'] = uuid.uuid4().hex
+
+@st.cache_resource
+def get_live_store():
+    # SALMEEN_LIVE_DB shares live statuses between several server processes
+    live_db = os.environ.get("SALMEEN_LIVE_DB")
+    return SQLiteStatusStore(live_db) if live_db else LiveStatusStore()
 
 # --- 3. بناء وتدريب نموذج الذكاء الاصطناعي ---
+MODEL_ARTIFACT = os.path.join("models", "citizen_model.joblib")
+
 @st.cache_resource
 def train_model():
-    np.random.seed(42)
-    n_samples = 1000
-    speed = np.random.normal(90, 20, n_samples)
-    braking = np.random.randint(0, 10, n_samples)
-    peak_hour = np.random.randint(0, 2, n_samples)
-    X = pd.DataFrame({'speed': speed, 'braking': braking, 'peak_hour': peak_hour})
-    y = []
-    for i in range(n_samples):
-        risk = 0 
-        if speed[i] > 120 or braking[i] > 5: risk = 2 
-        elif speed[i] > 100 or braking[i] > 3: risk = 1 
-        y.append(risk)
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2)
-    model = RandomForestClassifier(n_estimators=50)
-    model.fit(X_train, y_train)
-    acc = accuracy_score(y_test, model.predict(X_test))
-    return model, acc
-
-model, accuracy = train_model()
+    # Load the persisted model when available; retrain only on a cold start
+    # or when the artifact no longer matches the feature schema or scikit-learn
+    if os.path.exists(MODEL_ARTIFACT):
+        try:
+            artifact = load_artifact(MODEL_ARTIFACT, CITIZEN_FEATURES)
+            return artifact["model"], artifact["metadata"]["accuracy"], artifact["model_version"]
+        except (ValueError, KeyError):
+            pass
+    model, acc = train_citizen_model()
+    model_version = save_artifact(MODEL_ARTIFACT, model, None, CITIZEN_FEATURES, {"accuracy": float(acc)})
+    return model, acc, model_version
+
+with section("app.train_model"):
+    model, accuracy, model_version = train_model()
+
+
+@st.cache_resource
+def build_prediction_table(model_version, _model):
+    # One forest evaluation per model version, shared by every session;
+    # slider reruns become array lookups
+    return CitizenPredictionTable(_model)
+
+
+@st.cache_resource
+def get_city_analytics():
+    # One analytics engine per process: KPIs, violation cube and grid index are
+    # recomputed from the logs at most once per TTL, whatever the session count
+    return CityAnalytics(lambda: load_driving_data("driving_data.csv"), model_accuracy=accuracy, ttl=300)
+
+
+@st.cache_resource
+def get_log_database():
+    # Indexed SQL copy of the logs for the analyst queries; built from the
+    # CSV the first time, atomically, so no process sees a partial import
+    return LogDatabase.from_csv("driving_data.csv", os.environ.get("SALMEEN_LOG_DB", "driving_logs.db"))
 
 
 def get_risk_label(risk_code):
@@ -171,8 +205,8 @@ if st.session_state['page'] == 'home':
             
     # --- التعديل 1: ربط الشعار بالواقع ---
     city_score = 94 # Default
-    # إذا كان المستخدم متهوراً، نخفض نقاط المدينة قليلاً "بسببك"
-    if st.session_state['user_status']['risk_level'] == 2:
+    # إذا كان أحد المستخدمين متهوراً الآن، نخفض نقاط المدينة قليلاً
+    if get_live_store().snapshot()['risk_counts'][2] > 0:
         city_score = 91 
         
     st.markdown(f"""
@@ -232,17 +266,13 @@ elif st.session_state['page'] == 'citizen':
         st.markdown('</div>', unsafe_allow_html=True)
     
     # AI Calculation
-    user_input = [[user_speed, user_braking, 1]]
-    prediction_code = model.predict(user_input)[0]
+    with section("app.citizen.predict"):
+        prediction_code = build_prediction_table(model_version, model).predict(user_speed, user_braking)
     risk_label, risk_advice = get_risk_label(prediction_code)
     current_score = int(max(0, min(100, 100 - (user_speed/2.2) - (user_braking * 3))))
     
     # --- التعديل 2: تحديث الحالة العامة (إرسال البيانات للوزارة) ---
-    st.session_state['user_status'] = {
-        'score': current_score,
-        'risk_level': prediction_code,
-        'speed': user_speed
-    }
+    get_live_store().publish(st.session_state['session_id'], current_score, prediction_code, speed=user_speed)
     
     score_color = "#124641" if current_score > 70 else "#FD9E19"
     if current_score < 50: score_color = "#D32F2F"
@@ -314,32 +344,38 @@ elif st.session_state['page'] == 'ministry':
     
     st.write("")
     
-    # --- التعديل 3: استقبال بيانات المواطن ---
-    user_status = st.session_state['user_status']
-    
+    # --- التعديل 3: استقبال بيانات المواطنين (كل الجلسات الحية) ---
+    live = get_live_store().snapshot()
+    high_risk_drivers = live['risk_counts'][2]
     
-    total_violations = 1243
-    city_safety = 84
+    with section("app.ministry.kpis"):
+        city_kpis = get_city_analytics().snapshot()
+    violation_cube = city_kpis['cube']
+    today = city_kpis['last_date']
+    total_violations = city_kpis['total_violations']
+    city_safety = city_kpis['city_safety']
     
-    if user_status['risk_level'] == 2:
-        city_safety = 81 # انخفض المؤشر العام
-        total_violations += 1 # زادت المخالفات
+    if high_risk_drivers > 0:
+        city_safety -= 3 # انخفض المؤشر العام
+        total_violations += high_risk_drivers # زادت المخالفات
     
     st.markdown("### 📊 المؤشرات العامة للمدينة (Real-Time KPIs)")
 
     k1, k2, k3, k4 = st.columns(4)
     with k1:
-        st.markdown(f"""<div class="metric-card"><div class="metric-label">إجمالي المخالفات (اليوم)</div><div class="metric-value">{total_violations}</div><div class="metric-delta {'negative' if user_status['risk_level']==2 else 'positive'}">{'↑ زيادة' if user_status['risk_level']==2 else '↓ تحسن'}</div></div>""", unsafe_allow_html=True)
+        st.markdown(f"""<div class="metric-card"><div class="metric-label">إجمالي المخالفات (اليوم)</div><div class="metric-value">{total_violations}</div><div class="metric-delta {'negative' if high_risk_drivers else 'positive'}">{'↑ زيادة' if high_risk_drivers else '↓ تحسن'}</div></div>""", unsafe_allow_html=True)
         
     with k2:
-        st.markdown(f"""<div class="metric-card" style="border-right-color: #FD9E19;"><div class="metric-label">مؤشر الالتزام العام</div><div class="metric-value">{city_safety}%</div><div class="metric-delta {'negative' if user_status['risk_level']==2 else 'positive'}">{'↓ انخفاض' if user_status['risk_level']==2 else '↑ ارتفاع'}</div></div>""", unsafe_allow_html=True)
+        st.markdown(f"""<div class="metric-card" style="border-right-color: #FD9E19;"><div class="metric-label">مؤشر الالتزام العام</div><div class="metric-value">{city_safety}%</div><div class="metric-delta {'negative' if high_risk_drivers else 'positive'}">{'↓ انخفاض' if high_risk_drivers else '↑ ارتفاع'}</div></div>""", unsafe_allow_html=True)
 
     with k3:
-        st.markdown("""<div class="metric-card"><div class="metric-label">دقة تنبؤات AI</div><div class="metric-value">99.2%</div><div class="metric-delta positive">✔ نظام مستقر</div></div>""", unsafe_allow_html=True)
+        st.markdown(f"""<div class="metric-card"><div class="metric-label">دقة تنبؤات AI</div><div class="metric-value">{city_kpis['ai_accuracy']}%</div><div class="metric-delta positive">✔ نظام مستقر</div></div>""", unsafe_allow_html=True)
+
+    grid_index = city_kpis['grid']
 
     with k4:
-        # عدد المناطق الخطرة يزيد لو المواطن متهور
-        risk_zones = 3 + (1 if user_status['risk_level'] == 2 else 0)
+        # عدد المناطق الخطرة من الشبكة المكانية للسجلات الفعلية
+        risk_zones = city_kpis['risk_zones']
         st.markdown(f"""<div class="metric-card" style="border-right-color: #D32F2F;"><div class="metric-label">مناطق عالية الخطورة</div><div class="metric-value">{risk_zones}</div><div class="metric-delta negative">⚠ تتطلب تدخل</div></div>""", unsafe_allow_html=True)
 
     st.divider()
@@ -348,24 +384,52 @@ elif st.session_state['page'] == 'ministry':
 
     with col_main:
         st.markdown("##### 🗺️ الخريطة الحرارية للمخاطر وتوزيع المناطق")
-        map_data = pd.DataFrame(np.random.randn(200, 2) / [50, 50] + [24.7136, 46.6753], columns=['lat', 'lon'])
-        st.map(map_data, zoom=10, use_container_width=True)
+        cells = grid_index.cells(level=14)
+        map_data = pd.DataFrame({
+            'lat': cells['lat'],
+            'lon': cells['lon'],
+            'size': 100 + 400 * cells['risk_index'],
+        })
+        st.map(map_data, size='size', zoom=10, use_container_width=True)
         
         st.markdown("##### 📈 تحليل المخالفات حسب الأحياء")
-        chart_data = pd.DataFrame({'المخالفات': [120, 95, 80, 45, 30], 'الحي': ['الملقا', 'النرجس', 'الياسمين', 'العليا', 'النخيل']}).set_index('الحي')
+        by_district = violation_cube.rollup(today - pd.Timedelta(days=29), today)["records"].nlargest(5)
+        chart_data = pd.DataFrame({'المخالفات': by_district.to_numpy(), 'الحي': by_district.index}).set_index('الحي')
         st.bar_chart(chart_data, color="#124641")
+        
+        st.markdown("##### 🔎 استعلام تحليلي")
+        log_db = get_log_database()
+        q1, q2, q3 = st.columns(3)
+        with q1: query_location = st.selectbox("الموقع", ["الكل"] + violation_cube.locations)
+        with q2: query_violation = st.selectbox("نوع المخالفة", ["الكل"] + VIOLATION_TYPES[1:])
+        with q3: query_days = st.selectbox("الفترة (أيام)", [7, 30, 90])
+        query_filters = dict(
+            start_date=today - pd.Timedelta(days=query_days - 1),
+            end_date=today,
+            location=None if query_location == "الكل" else query_location,
+        )
+        with section("app.ministry.sql_query"):
+            daily = log_db.violation_counts(
+                violation_type=None if query_violation == "الكل" else query_violation, by=("date",), **query_filters
+            )
+            phone_by_hour = log_db.phone_usage_by_hour(**query_filters)
+        st.bar_chart(daily.rename(columns={'records': 'المخالفات'}), color="#FD9E19")
+        if len(phone_by_hour):
+            st.line_chart((phone_by_hour['phone_usage_rate'] * 100).rename('استخدام الجوال % حسب الساعة'), color="#124641")
 
     with col_side:
         st.markdown("##### 🚨 سجل التنبيهات الحية (Live Feed)")
         
-        # --- التعديل 4: إضافة تنبيه المواطن الحالي ---
+        # --- التعديل 4: تنبيهات المواطنين الحية من كل الجلسات ---
         alerts = []
         
-        # إذا كان المواطن في وضع خطر، يظهر أول تنبيه
-        if user_status['risk_level'] == 2:
-            alerts.append({"time": "الآن", "msg": f"⚠️ تم رصد سائق متهور (سرعة {user_status['speed']} كم) - المستخدم الحالي", "type": "danger"})
-        elif user_status['risk_level'] == 1:
-            alerts.append({"time": "الآن", "msg": "تنبيه سلوك متوسط الخطورة - المستخدم الحالي", "type": "warning"})
+        for live_alert in live['alerts'][:5]:
+            minutes = int((time.time() - live_alert['time']) // 60)
+            alert_time = "الآن" if minutes == 0 else f"منذ {minutes} د"
+            if live_alert['risk_level'] == 2:
+                alerts.append({"time": alert_time, "msg": f"⚠️ تم رصد سائق متهور (سرعة {live_alert['speed']} كم)", "type": "danger"})
+            else:
+                alerts.append({"time": alert_time, "msg": "تنبيه سلوك متوسط الخطورة", "type": "warning"})
             
         # تنبيهات افتراضية
         alerts += [
@@ -385,6 +449,22 @@ elif st.session_state['page'] == 'ministry':
                 </div>
             """, unsafe_allow_html=True)
         
-        st.markdown("##### 📉 توزيع مستويات الخطر")
-        dist_data = pd.DataFrame({'النسبة': [70, 20, 10]}, index=['آمن', 'متوسط', 'خطر'])
+        st.markdown(f"##### 📉 توزيع مستويات الخطر ({live['active_sessions']} مستخدم نشط)")
+        if live['active_sessions'] > 0:
+            distribution = [round(live['risk_distribution'][level] * 100) for level in (0, 1, 2)]
+        else:
+            distribution = [70, 20, 10]
+        dist_data = pd.DataFrame({'النسبة': distribution}, index=['آمن', 'متوسط', 'خطر'])
         st.bar_chart(dist_data, horizontal=True, color=["#124641"])
+
+# ==========================================
+# لوحة التشخيص المخفية (Debug Panel)
+# ==========================================
+if instrumentation.is_enabled():
+    instrumentation.record(f"app.page.{st.session_state['page']}", time.perf_counter() - rerun_start)
+
+if DEBUG_PANEL:
+    with st.expander("⏱️ Timing (p50/p95/p99)"):
+        timings = instrumentation.snapshot()
+        st.dataframe(pd.DataFrame(timings).T.round(3), use_container_width=True)
+        st.download_button("JSON", instrumentation.export_json(), file_name="salmeen_timings.json")
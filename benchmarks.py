@@ -0,0 +1,220 @@
+"""
+Benchmark Suite for Salmeen Platform
+Measures throughput and peak memory of the scoring, ML and data generation
+hot paths, and fails when they regress against stored baselines.
+
+Usage:
+    python benchmarks.py --save-baseline          # record baselines
+    python benchmarks.py                          # compare against them
+    python benchmarks.py --sizes 1000 100000      # smaller run
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from cache import DriverResultCache
+from model import AICoach, RiskPredictor, SafetyScoreCalculator, train_citizen_model
+from utils import generate_dummy_data
+
+
+DEFAULT_SIZES = [1_000, 100_000, 10_000_000]
+DEFAULT_BASELINE = "benchmarks_baseline.json"
+
+
+def _make_logs(size):
+    return generate_dummy_data(size, vectorized=True)
+
+
+def _trained_predictor():
+    predictor = RiskPredictor()
+    predictor.train(generate_dummy_data(2_000, vectorized=True))
+    return predictor
+
+
+def _primed_report_cache(size):
+    cache, logs, predictor = DriverResultCache(), _make_logs(size), _trained_predictor()
+    cache.report(0, logs, predictor)
+    return cache, logs, predictor
+
+
+# name -> (setup(size) returning call arguments, function, largest practical size)
+BENCHMARKS = {
+    "generate_dummy_data": (lambda size: (size,), generate_dummy_data, 100_000),
+    "generate_dummy_data[vectorized]": (
+        lambda size: (size,), lambda size: generate_dummy_data(size, vectorized=True), None
+    ),
+    "SafetyScoreCalculator.calculate_score": (
+        lambda size: (SafetyScoreCalculator(), _make_logs(size)),
+        lambda calculator, logs: calculator.calculate_score(logs),
+        None,
+    ),
+    "RiskPredictor.prepare_features": (
+        lambda size: (RiskPredictor(), _make_logs(size)),
+        lambda predictor, logs: predictor.prepare_features(logs),
+        None,
+    ),
+    "RiskPredictor.train": (
+        lambda size: (RiskPredictor(), _make_logs(size)),
+        lambda predictor, logs: predictor.train(logs),
+        None,
+    ),
+    "RiskPredictor.update": (
+        lambda size: (_trained_predictor(), _make_logs(size)),
+        lambda predictor, logs: predictor.update(logs),
+        None,
+    ),
+    "RiskPredictor.predict": (
+        lambda size: (_trained_predictor(), _make_logs(size)),
+        lambda predictor, logs: predictor.predict(logs),
+        None,
+    ),
+    "AICoach.generate_recommendations": (
+        lambda size: (AICoach(), _make_logs(size)),
+        lambda coach, logs: coach.generate_recommendations(logs, 80),
+        None,
+    ),
+    # Repeat view of a driver profile served from the per-driver result cache
+    "DriverResultCache.report[hit]": (
+        lambda size: _primed_report_cache(size),
+        lambda cache, logs, predictor: cache.report(0, logs, predictor),
+        None,
+    ),
+    # app.train_model: the citizen model it trains (or loads) on a cold start
+    "app.train_model": (lambda size: (size,), train_citizen_model, 1_000_000),
+}
+
+
+def run_benchmark(name, size, repeat=3):
+    """
+    Time one benchmark at one input size
+
+    Args:
+        name (str): Key in BENCHMARKS
+        size (int): Number of rows (or samples)
+        repeat (int): Timed runs; the best one is kept
+
+    Returns:
+        dict: seconds, rows_per_second and peak_mb, or None when size is
+            beyond the benchmark's practical limit
+    """
+    setup, func, max_size = BENCHMARKS[name]
+    if max_size is not None and size > max_size:
+        return None
+
+    # Silence progress prints such as RiskPredictor.train's
+    with contextlib.redirect_stdout(io.StringIO()):
+        args = setup(size)
+
+        # Peak memory from one traced run, timings from untraced runs
+        gc.collect()
+        tracemalloc.start()
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        timings = []
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            func(*args)
+            timings.append(time.perf_counter() - start)
+
+    seconds = min(timings)
+    return {
+        "seconds": seconds,
+        "rows_per_second": size / seconds if seconds > 0 else float("inf"),
+        "peak_mb": peak / 1024 ** 2,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Find results slower or heavier than the baseline beyond a threshold
+
+    Args:
+        results (dict): Current results keyed by "name@size"
+        baseline (dict): Stored results keyed by "name@size"
+        threshold (float): Allowed relative increase (0.25 = 25%)
+
+    Returns:
+        list: Human-readable regression descriptions
+    """
+    regressions = []
+    for key, current in results.items():
+        reference = baseline.get(key)
+        if current is None or reference is None:
+            continue
+        for metric in ("seconds", "peak_mb"):
+            # Ignore sub-millisecond / sub-megabyte noise
+            floor = 1e-3 if metric == "seconds" else 1.0
+            if current[metric] > max(reference[metric], floor) * (1 + threshold):
+                regressions.append(
+                    f"{key}: {metric} {current[metric]:.4g} vs baseline {reference[metric]:.4g}"
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Salmeen benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Benchmarks to run")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        for size in args.sizes:
+            result = run_benchmark(name, size, args.repeat)
+            results[f"{name}@{size}"] = result
+            if result is None:
+                print(f"⏭️  {name:<40} {size:>11,} rows  skipped (beyond practical size)")
+            else:
+                print(
+                    f"⏱️  {name:<40} {size:>11,} rows  {result['seconds']:9.4f}s  "
+                    f"{result['rows_per_second']:>14,.0f} rows/s  {result['peak_mb']:9.1f} MB"
+                )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update({key: value for key, value in results.items() if value is not None})
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"✅ Saved baselines to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️ No baseline at {args.baseline}; run with --save-baseline first")
+        return 0
+
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.threshold)
+    if regressions:
+        print("❌ Performance regressions:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+
+    print("✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
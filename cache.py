@@ -0,0 +1,285 @@
+"""
+Result Caches for Salmeen Platform
+Shared in-process caches for dashboard and per-driver results
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from model import AICoach, DriverFeatures, SafetyScoreCalculator
+
+
+class TTLCache:
+    """Thread-safe cache whose entries expire a fixed time after being computed"""
+
+    def __init__(self, ttl=300, clock=time.monotonic):
+        """
+        Args:
+            ttl (float): Seconds an entry stays valid
+            clock (callable): Monotonic time source
+        """
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for key, computing it when missing or expired
+
+        Concurrent callers asking for the same expired key wait for a single
+        recompute instead of each running compute.
+
+        Args:
+            key: Hashable cache key
+            compute (callable): Builds the value when needed
+
+        Returns:
+            The cached or freshly computed value
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > self.clock():
+            return entry[1]
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                return entry[1]
+            value = compute()
+            self._entries[key] = (self.clock() + self.ttl, value)
+            return value
+
+    def invalidate(self, key=None):
+        """
+        Drop one entry, or every entry when key is None
+
+        Args:
+            key: Cache key to drop
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+class LRUCache:
+    """
+    Thread-safe cache bounded by entry count and estimated memory, evicting
+    the least recently used entries first
+    """
+
+    def __init__(self, max_entries=10_000, max_bytes=64 * 1024 ** 2, sizeof=None):
+        """
+        Args:
+            max_entries (int): Maximum number of entries
+            max_bytes (int): Memory cap over the estimated entry sizes
+            sizeof (callable): Size estimate of a value in bytes (default:
+                estimate_size)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or estimate_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """
+        Look up a key, marking it as recently used
+
+        Args:
+            key: Hashable cache key
+            default: Returned on a miss
+
+        Returns:
+            The cached value, or default
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        """
+        Store a value, evicting least recently used entries beyond the limits
+
+        Values larger than max_bytes on their own are not stored.
+
+        Args:
+            key: Hashable cache key
+            value: Value to cache
+        """
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[0]
+            self._entries[key] = (size, value)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                evicted_size, _ = self._entries.popitem(last=False)[1]
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for key, computing and storing it on a miss
+
+        compute runs outside the lock, so concurrent misses on one key may
+        each compute it; the last result is kept.
+
+        Args:
+            key: Hashable cache key
+            compute (callable): Builds the value when needed
+
+        Returns:
+            The cached or freshly computed value
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def invalidate(self, key=None):
+        """
+        Drop one entry, or every entry when key is None
+
+        Args:
+            key: Cache key to drop
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self.bytes = 0
+            else:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self.bytes -= entry[0]
+
+    def stats(self):
+        """
+        Cache counters
+
+        Returns:
+            dict: hits, misses, hit_rate, evictions, entries and bytes
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+
+class DriverResultCache(LRUCache):
+    """
+    Per-driver score, risk prediction and coaching results
+
+    Keys combine the driver, the latest log timestamp, the record count and
+    the model version, so new logs or a retrained model miss the cache
+    instead of serving stale results; the old entries age out by LRU.
+    """
+
+    def report(self, driver_id, driver_data, predictor, calculator=None, coach=None):
+        """
+        Full driver report, computed from one pass over the logs on a miss
+
+        Args:
+            driver_id: Driver identifier
+            driver_data (pd.DataFrame): Driver's driving logs
+            predictor (RiskPredictor): Risk predictor (its model_version is part of the key)
+            calculator (SafetyScoreCalculator): Score calculator
+            coach (AICoach): Recommendation generator
+
+        Returns:
+            dict: score, category, color, risk prediction and recommendations
+        """
+        key = driver_result_key(driver_id, driver_data, predictor.model_version)
+        return self.get_or_compute(
+            key, lambda: _build_driver_report(driver_data, predictor, calculator, coach)
+        )
+
+
+def driver_result_key(driver_id, driver_data, model_version):
+    """
+    Cache key that changes whenever a driver's logs or the model change
+
+    Args:
+        driver_id: Driver identifier
+        driver_data (pd.DataFrame): Driver's driving logs
+        model_version (str): Version of the model producing the results
+
+    Returns:
+        tuple: (driver, latest log time, record count, model version)
+    """
+    time_column = "timestamp" if "timestamp" in driver_data.columns else "date"
+    latest = driver_data[time_column].max() if len(driver_data) else None
+    return (driver_id, str(latest), len(driver_data), model_version)
+
+
+def _build_driver_report(driver_data, predictor, calculator=None, coach=None):
+    """Score, risk prediction and coaching from one DriverFeatures pass"""
+    calculator = calculator or SafetyScoreCalculator()
+    coach = coach or AICoach()
+    features = DriverFeatures.from_logs(driver_data)
+    score = calculator.calculate_score(features)
+    return {
+        "score": score,
+        "category": calculator.get_score_category(score),
+        "color": calculator.get_score_color(score),
+        "risk": predictor.predict(features),
+        "recommendations": coach.generate_recommendations(features, score),
+    }
+
+
+def estimate_size(value):
+    """
+    Approximate memory held by a cached value in bytes
+
+    Args:
+        value: Cached value (containers are measured recursively)
+
+    Returns:
+        int: Estimated size
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(deep=True)))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in value)
+    return size
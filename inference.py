@@ -0,0 +1,155 @@
+"""
+Compiled Tree Inference for Salmeen Platform
+Evaluates fitted random forests from flat NumPy node arrays
+"""
+
+import numpy as np
+
+
+class CompiledForest:
+    """
+    A fitted RandomForestClassifier (plus optional StandardScaler) exported
+    to flat node arrays
+
+    Every tree is padded to the same node count and stored back to back, so
+    one row or a batch is routed through all trees at once, one tree level
+    per step. Leaves point to themselves, so rows that reach a leaf early
+    simply stay there. Inputs are compared in float32 against the float64
+    thresholds and tree probabilities are summed in tree order, exactly as
+    sklearn does, so predictions and probabilities are identical.
+    """
+
+    def __init__(self, feature, threshold, children_left, children_right, value,
+                 classes, n_estimators, max_depth, scaler_mean=None, scaler_scale=None):
+        """
+        Args:
+            feature (np.ndarray): Split feature per node, shape (trees, nodes)
+            threshold (np.ndarray): Split threshold per node, shape (trees, nodes)
+            children_left (np.ndarray): Flat index of the left child per node
+            children_right (np.ndarray): Flat index of the right child per node
+            value (np.ndarray): Class probabilities per node, shape (trees, nodes, classes)
+            classes (np.ndarray): Class labels in probability column order
+            n_estimators (int): Number of trees
+            max_depth (int): Deepest leaf over all trees
+            scaler_mean (np.ndarray): StandardScaler mean_, applied before the trees
+            scaler_scale (np.ndarray): StandardScaler scale_
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.children_left = children_left
+        self.children_right = children_right
+        self.value = value
+        self.classes_ = classes
+        self.n_estimators = n_estimators
+        self.max_depth = max_depth
+        self.scaler_mean = scaler_mean
+        self.scaler_scale = scaler_scale
+        self._roots = np.arange(n_estimators) * feature.shape[1]
+
+    @classmethod
+    def from_sklearn(cls, forest, scaler=None):
+        """
+        Export a fitted forest and (optionally) the scaler in front of it
+
+        Args:
+            forest (RandomForestClassifier): Fitted single-output forest
+            scaler (StandardScaler): Fitted scaler applied to raw features
+
+        Returns:
+            CompiledForest: Engine with the same predictions as the forest
+        """
+        if getattr(forest, "n_outputs_", 1) != 1:
+            raise ValueError("Only single-output forests can be compiled")
+
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        n_trees = len(trees)
+        n_nodes = max(tree.node_count for tree in trees)
+        n_classes = len(forest.classes_)
+
+        feature = np.zeros((n_trees, n_nodes), dtype=np.intp)
+        threshold = np.zeros((n_trees, n_nodes), dtype=np.float64)
+        children_left = np.zeros((n_trees, n_nodes), dtype=np.intp)
+        children_right = np.zeros((n_trees, n_nodes), dtype=np.intp)
+        value = np.zeros((n_trees, n_nodes, n_classes), dtype=np.float64)
+
+        for t, tree in enumerate(trees):
+            count = tree.node_count
+            offset = t * n_nodes
+            nodes = np.arange(count)
+            is_leaf = tree.children_left == -1
+
+            feature[t, :count] = np.where(is_leaf, 0, tree.feature)
+            threshold[t, :count] = tree.threshold
+            children_left[t, :count] = np.where(is_leaf, nodes, tree.children_left) + offset
+            children_right[t, :count] = np.where(is_leaf, nodes, tree.children_right) + offset
+
+            # Normalize leaf values like DecisionTreeClassifier.predict_proba
+            proba = tree.value[:, 0, :].copy()
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            proba /= normalizer
+            value[t, :count] = proba
+
+        return cls(
+            feature, threshold, children_left, children_right, value,
+            classes=np.asarray(forest.classes_),
+            n_estimators=n_trees,
+            max_depth=max(tree.max_depth for tree in trees),
+            scaler_mean=scaler.mean_ if scaler is not None and scaler.with_mean else None,
+            scaler_scale=scaler.scale_ if scaler is not None and scaler.with_std else None,
+        )
+
+    def apply(self, X):
+        """
+        Route rows to their leaf in every tree
+
+        Args:
+            X (array-like): Raw features, shape (rows, features)
+
+        Returns:
+            np.ndarray: Flat leaf index per tree and row, shape (trees, rows)
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        if self.scaler_mean is not None:
+            X = X - self.scaler_mean
+        if self.scaler_scale is not None:
+            X = X / self.scaler_scale
+        X = X.astype(np.float32)
+
+        rows = np.arange(len(X))
+        nodes = np.repeat(self._roots[:, np.newaxis], len(X), axis=1)
+        feature = self.feature.ravel()
+        threshold = self.threshold.ravel()
+        for _ in range(self.max_depth):
+            go_left = X[rows, feature[nodes]] <= threshold[nodes]
+            nodes = np.where(go_left, self.children_left.ravel()[nodes], self.children_right.ravel()[nodes])
+        return nodes
+
+    def predict_proba(self, X):
+        """
+        Class probabilities averaged over the trees
+
+        Args:
+            X (array-like): Raw features, shape (rows, features) or (features,)
+
+        Returns:
+            np.ndarray: Probabilities, shape (rows, classes)
+        """
+        leaves = self.apply(X)
+        proba = self.value.reshape(-1, len(self.classes_))[leaves]
+        # Accumulate tree by tree, in the forest's order
+        return np.add.reduce(proba, axis=0) / self.n_estimators
+
+    def predict(self, X):
+        """
+        Most probable class per row
+
+        Args:
+            X (array-like): Raw features, shape (rows, features) or (features,)
+
+        Returns:
+            np.ndarray: Class labels
+        """
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
@@ -0,0 +1,372 @@
+"""
+Telemetry Ingestion Service for Salmeen Platform
+Asyncio HTTP server that buffers live driving events and scores them in micro-batches
+
+Usage:
+    python ingest.py --port 8765 --batch-size 1000 --flush-interval 0.5
+
+    POST /events   JSON object, JSON array or NDJSON lines (driving_data.csv fields)
+    GET  /stats    ingest rate, queue depth and batch counters
+"""
+
+import argparse
+import asyncio
+import json
+import numbers
+import time
+
+import numpy as np
+import pandas as pd
+
+from model import SafetyScoreCalculator, aggregate_driver_stats
+
+
+# Fields every event needs for scoring (plus the driver key)
+REQUIRED_FIELDS = ["speed_kmh", "speed_limit", "harsh_braking", "phone_usage", "violation_type"]
+NUMERIC_FIELDS = ["speed_kmh", "speed_limit", "harsh_braking", "phone_usage"]
+
+STATUS_TEXT = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 503: "Service Unavailable"}
+
+
+class RunningDriverStats:
+    """
+    Running per-driver statistics updated in place, one batch at a time
+
+    Rows live in preallocated arrays that grow by doubling, with a dict
+    from driver to row, so an update costs O(batch drivers) however many
+    drivers have been seen.
+    """
+
+    def __init__(self, capacity=1024):
+        """
+        Args:
+            capacity (int): Initial number of driver rows
+        """
+        self.capacity = capacity
+        self.rows = {}
+        self.columns = None
+        self.index_name = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def update(self, partial):
+        """
+        Fold one batch's statistics into the running totals
+
+        Args:
+            partial (pd.DataFrame): aggregate_driver_stats output for the batch
+
+        Returns:
+            pd.DataFrame: Running statistics of the batch's drivers, in partial's order
+        """
+        if self.columns is None:
+            self.index_name = partial.index.name
+            self.columns = {column: np.zeros(self.capacity, dtype=partial[column].dtype)
+                            for column in partial.columns}
+            self.columns["speed_max"][:] = -np.inf
+
+        rows = np.fromiter((self.rows.setdefault(key, len(self.rows)) for key in partial.index),
+                           dtype=np.int64, count=len(partial))
+        if len(self.rows) > self.capacity:
+            self._grow(len(self.rows))
+
+        for column, values in self.columns.items():
+            if column == "speed_max":
+                values[rows] = np.maximum(values[rows], partial[column].to_numpy())
+            else:
+                # Driver keys in a partial are unique, so plain fancy-index adds are safe
+                values[rows] += partial[column].to_numpy()
+        return pd.DataFrame({column: values[rows] for column, values in self.columns.items()},
+                            index=partial.index)
+
+    def to_frame(self):
+        """
+        Returns:
+            pd.DataFrame: Running statistics of every driver, sorted by driver
+        """
+        if self.columns is None:
+            return pd.DataFrame()
+        index = pd.Index(list(self.rows), name=self.index_name)
+        frame = pd.DataFrame({column: values[:len(self.rows)] for column, values in self.columns.items()},
+                             index=index)
+        return frame.sort_index()
+
+    def _grow(self, needed):
+        while self.capacity < needed:
+            self.capacity *= 2
+        for column, values in self.columns.items():
+            fill = -np.inf if column == "speed_max" else 0
+            grown = np.full(self.capacity, fill, dtype=values.dtype)
+            grown[:len(values)] = values
+            self.columns[column] = grown
+
+
+class TelemetryIngestor:
+    """Bounded event queue feeding micro-batches into scoring and risk prediction"""
+
+    def __init__(self, predictor=None, by="driver_id", batch_size=1000, flush_interval=0.5,
+                 max_queue=100_000, enqueue_timeout=1.0, sink=None):
+        """
+        Args:
+            predictor (RiskPredictor): Trained predictor for risk levels (optional)
+            by (str): Event field identifying the driver
+            batch_size (int): Maximum events per micro-batch
+            flush_interval (float): Seconds before a partial batch is flushed
+            max_queue (int): Queue capacity; producers wait when it is full
+            enqueue_timeout (float): Seconds a request may wait for queue space
+                before it is rejected (backpressure)
+            sink (callable): Receives each batch's per-driver results
+        """
+        self.predictor = predictor
+        self.by = by
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.sink = sink
+        self.calculator = SafetyScoreCalculator()
+        self.queue = asyncio.Queue(maxsize=max_queue)
+
+        # Running per-driver statistics, so scores cover all events seen
+        self.driver_stats = RunningDriverStats()
+        self.latest = pd.DataFrame()
+
+        self.started_at = time.monotonic()
+        self.accepted = 0
+        self.rejected = 0
+        self.processed = 0
+        self.batches = 0
+        self.failed = 0
+        self._rate = 0.0
+        self._rate_mark = (time.monotonic(), 0)
+
+    def validate(self, event):
+        """
+        Check that an event can be scored
+
+        Args:
+            event (dict): Decoded event
+
+        Raises:
+            ValueError: If the event is not an object or a field is missing or mistyped
+        """
+        if not isinstance(event, dict):
+            raise ValueError(f"Events must be JSON objects, got {type(event).__name__}")
+        missing = [field for field in REQUIRED_FIELDS + [self.by] if field not in event]
+        if missing:
+            raise ValueError(f"Missing fields: {', '.join(missing)}")
+        not_numeric = [field for field in NUMERIC_FIELDS if not isinstance(event[field], numbers.Real)]
+        if not_numeric:
+            raise ValueError(f"Fields must be numbers: {', '.join(not_numeric)}")
+        if not isinstance(event["violation_type"], str):
+            raise ValueError("Field must be a string: violation_type")
+
+    async def submit(self, events):
+        """
+        Enqueue events, waiting for space up to enqueue_timeout
+
+        Args:
+            events (list): Event dicts
+
+        Returns:
+            int: Number of events accepted before the queue stayed full
+        """
+        accepted = 0
+        for event in events:
+            try:
+                if self.queue.full():
+                    await asyncio.wait_for(self.queue.put(event), self.enqueue_timeout)
+                else:
+                    self.queue.put_nowait(event)
+            except asyncio.TimeoutError:
+                break
+            accepted += 1
+        self.accepted += accepted
+        self.rejected += len(events) - accepted
+        return accepted
+
+    async def run(self):
+        """Collect micro-batches forever and score them off the event loop"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    if not self.queue.empty():
+                        batch.append(self.queue.get_nowait())
+                        continue
+                    batch.append(await asyncio.wait_for(self.queue.get(), deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                result = await loop.run_in_executor(None, self.process, batch)
+                if self.sink is not None:
+                    self.sink(result)
+            except Exception as e:
+                # Drop the batch but keep ingesting
+                self.failed += len(batch)
+                print(f"❌ Dropped batch of {len(batch)} events: {e!r}")
+
+    def process(self, events):
+        """
+        Score one micro-batch
+
+        Args:
+            events (list): Event dicts
+
+        Returns:
+            pd.DataFrame: Updated score (and risk prediction) for each driver in the batch
+        """
+        frame = pd.DataFrame.from_records(events)
+        partial = aggregate_driver_stats(frame, self.by)
+        stats = self.driver_stats.update(partial)
+
+        result = self.calculator.calculate_scores(stats=stats)
+        if self.predictor is not None and self.predictor.is_trained:
+            result = result.join(self.predictor.predict_many(stats=stats))
+
+        self.latest = result
+        self.processed += len(events)
+        self.batches += 1
+        return result
+
+    def stats(self):
+        """
+        Ingest counters for monitoring
+
+        Returns:
+            dict: Rates, queue depth and totals
+        """
+        now = time.monotonic()
+        mark_time, mark_count = self._rate_mark
+        if now - mark_time >= 1.0:
+            current = (self.accepted - mark_count) / (now - mark_time)
+            # Exponentially weighted events/second
+            self._rate = current if self._rate == 0 else 0.7 * self._rate + 0.3 * current
+            self._rate_mark = (now, self.accepted)
+        return {
+            "ingest_rate": round(self._rate, 1),
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "processed": self.processed,
+            "batches": self.batches,
+            "failed": self.failed,
+            "uptime_s": round(now - self.started_at, 1),
+        }
+
+
+def _parse_events(body):
+    """Accept a JSON object, a JSON array or newline-delimited JSON"""
+    text = body.decode("utf-8").strip()
+    if not text:
+        return []
+    try:
+        payload = json.loads(text)
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    return payload if isinstance(payload, list) else [payload]
+
+
+async def _respond(writer, status, payload):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    writer.write(
+        f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+        f"Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+
+
+async def _handle_connection(ingestor, reader, writer):
+    """Serve HTTP/1.1 requests on one keep-alive connection"""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+            if method == "POST" and path == "/events":
+                try:
+                    events = _parse_events(body)
+                    for event in events:
+                        ingestor.validate(event)
+                except ValueError as e:
+                    await _respond(writer, 400, {"error": str(e)})
+                else:
+                    accepted = await ingestor.submit(events)
+                    status = 202 if accepted == len(events) else 503
+                    await _respond(writer, status, {"accepted": accepted, "rejected": len(events) - accepted})
+            elif method == "GET" and path == "/stats":
+                await _respond(writer, 200, ingestor.stats())
+            else:
+                await _respond(writer, 404, {"error": f"No route for {method} {path}"})
+
+            if headers.get("connection", "").lower() == "close":
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(ingestor, host="127.0.0.1", port=8765):
+    """
+    Run the HTTP server and the micro-batcher until cancelled
+
+    Args:
+        ingestor (TelemetryIngestor): Queue and scoring pipeline
+        host (str): Bind address
+        port (int): Bind port
+    """
+    server = await asyncio.start_server(
+        lambda reader, writer: _handle_connection(ingestor, reader, writer), host, port
+    )
+    batcher = asyncio.create_task(ingestor.run())
+    print(f"✅ Ingesting telemetry on http://{host}:{port}/events")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batcher.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Salmeen telemetry ingestion service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--flush-interval", type=float, default=0.5)
+    parser.add_argument("--max-queue", type=int, default=100_000)
+    parser.add_argument("--model", help="RiskPredictor artifact for risk predictions")
+    args = parser.parse_args()
+
+    predictor = None
+    if args.model:
+        from model import RiskPredictor
+        predictor = RiskPredictor.load(args.model)
+
+    ingestor = TelemetryIngestor(
+        predictor,
+        batch_size=args.batch_size,
+        flush_interval=args.flush_interval,
+        max_queue=args.max_queue,
+    )
+    asyncio.run(serve(ingestor, args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Hot-Path Instrumentation for Salmeen Platform
+Opt-in latency histograms for model methods and app page sections
+"""
+
+import contextlib
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+# Instrumentation is off unless SALMEEN_INSTRUMENT=1 or enable() is called;
+# enable_thread() switches it on for the calling thread only
+_enabled = os.environ.get("SALMEEN_INSTRUMENT", "0") == "1"
+_thread = threading.local()
+_histograms = {}
+_lock = threading.Lock()
+
+
+class LatencyHistogram:
+    """Call count, total time and a sliding window of recent latencies"""
+
+    def __init__(self, window=10_000):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=window)
+
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+
+    def summary(self):
+        """
+        Summarize recorded latencies in milliseconds
+
+        Returns:
+            dict: count, mean, p50, p95, p99 and max
+        """
+        p50, p95, p99 = np.percentile(np.fromiter(self.samples, dtype=float), [50, 95, 99]) * 1000
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000,
+            "p50_ms": p50,
+            "p95_ms": p95,
+            "p99_ms": p99,
+            "max_ms": self.max * 1000,
+        }
+
+
+def enable():
+    """Start recording latencies"""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """Stop recording latencies (recorded data is kept)"""
+    global _enabled
+    _enabled = False
+
+
+def enable_thread(enabled=True):
+    """
+    Record latencies for code running in the calling thread only
+
+    Args:
+        enabled (bool): Switch thread-scoped recording on or off
+    """
+    _thread.enabled = enabled
+
+
+def is_enabled():
+    return _enabled or getattr(_thread, "enabled", False)
+
+
+def record(name, seconds):
+    """
+    Add one latency sample
+
+    Args:
+        name (str): Timer name, e.g. "RiskPredictor.predict"
+        seconds (float): Measured duration
+    """
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = LatencyHistogram()
+        histogram.record(seconds)
+
+
+@contextlib.contextmanager
+def section(name):
+    """
+    Time a block of code when instrumentation is enabled
+
+    Args:
+        name (str): Timer name
+    """
+    if not is_enabled():
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def instrument_class(cls):
+    """
+    Class decorator timing every public method as "<Class>.<method>"
+
+    Class and static methods are timed too. Generator methods are timed
+    over the steps spent inside them until they finish or are closed,
+    not the time the caller spends between items. When instrumentation
+    is disabled the wrappers only add a flag check.
+    """
+    for name, member in list(vars(cls).items()):
+        if name.startswith("_"):
+            continue
+        timer = f"{cls.__name__}.{name}"
+        if isinstance(member, (classmethod, staticmethod)):
+            setattr(cls, name, type(member)(_timed(timer, member.__func__)))
+        elif inspect.isfunction(member):
+            setattr(cls, name, _timed(timer, member))
+    return cls
+
+
+def _timed(name, func):
+    if inspect.isgeneratorfunction(func):
+        return _timed_generator(name, func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not is_enabled():
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record(name, time.perf_counter() - start)
+    return wrapper
+
+
+def _timed_generator(name, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        generator = func(*args, **kwargs)
+        if not is_enabled():
+            return (yield from generator)
+        elapsed = 0.0
+        sent = None
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = generator.send(sent)
+                except StopIteration as stop:
+                    return stop.value
+                finally:
+                    elapsed += time.perf_counter() - start
+                sent = yield item
+        finally:
+            generator.close()
+            record(name, elapsed)
+    return wrapper
+
+
+def snapshot():
+    """
+    Latency summaries for every timer
+
+    Returns:
+        dict: Timer name -> summary (see LatencyHistogram.summary)
+    """
+    with _lock:
+        return {name: histogram.summary() for name, histogram in sorted(_histograms.items())}
+
+
+def export_json(path=None):
+    """
+    Export latency summaries as JSON
+
+    Args:
+        path (str): Optional file to write
+
+    Returns:
+        str: JSON document
+    """
+    document = json.dumps({"generated_at": time.time(), "timers": snapshot()}, indent=2)
+    if path:
+        with open(path, "w") as f:
+            f.write(document)
+    return document
+
+
+def reset():
+    """Forget all recorded latencies"""
+    with _lock:
+        _histograms.clear()
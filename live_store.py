@@ -0,0 +1,253 @@
+"""
+Live Citizen Status Store for Salmeen Platform
+Process-wide aggregate of every citizen session's score and risk level for
+the ministry dashboard, optionally shared across processes through SQLite
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+
+RISK_LEVELS = (0, 1, 2)  # 0: Safe, 1: Medium, 2: High
+
+
+class LiveStatusStore:
+    """
+    Thread-safe in-memory store of live citizen statuses
+
+    Writers serialize on a lock, update running risk counts and publish a
+    fresh immutable snapshot. Readers only read the current snapshot
+    reference, so hundreds of dashboard sessions never wait on each other
+    or on writers.
+    """
+
+    def __init__(self, ttl=900, max_alerts=50, refresh_interval=5.0, clock=time.time):
+        """
+        Args:
+            ttl (float): Seconds after its last update that a session stops counting
+            max_alerts (int): Number of recent alerts kept
+            refresh_interval (float): Age after which a reader refreshes the
+                snapshot (to expire idle sessions)
+            clock (callable): Wall-clock time source
+        """
+        self.ttl = ttl
+        self.max_alerts = max_alerts
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._risk_counts = dict.fromkeys(RISK_LEVELS, 0)
+        self._score_sum = 0.0
+        self._alerts = deque(maxlen=max_alerts)
+        self._expired_at = float("-inf")
+        self._snapshot = self._build()
+
+    def publish(self, session_id, score, risk_level, speed=None):
+        """
+        Record a citizen session's latest status
+
+        An alert is raised when a session's risk level rises to medium or high.
+
+        Args:
+            session_id (str): Browser session identifier
+            score (float): Current safety score
+            risk_level (int): 0 (safe), 1 (medium) or 2 (high)
+            speed (float): Current speed in km/h (optional)
+        """
+        now = self.clock()
+        status = {"score": float(score), "risk_level": int(risk_level), "speed": speed, "updated_at": now}
+        with self._lock:
+            previous = self._sessions.pop(session_id, None)
+            if previous is not None:
+                self._risk_counts[previous["risk_level"]] -= 1
+                self._score_sum -= previous["score"]
+            if status["risk_level"] > 0 and (previous is None or previous["risk_level"] < status["risk_level"]):
+                self._alerts.appendleft({"time": now, "session_id": session_id, **status})
+            self._sessions[session_id] = status
+            self._risk_counts[status["risk_level"]] += 1
+            self._score_sum += status["score"]
+            self._snapshot = self._build()
+
+    def remove(self, session_id):
+        """
+        Forget a session (e.g. when it ends)
+
+        Args:
+            session_id (str): Browser session identifier
+        """
+        with self._lock:
+            previous = self._sessions.pop(session_id, None)
+            if previous is not None:
+                self._risk_counts[previous["risk_level"]] -= 1
+                self._score_sum -= previous["score"]
+            self._snapshot = self._build()
+
+    def snapshot(self):
+        """
+        Current aggregate over all live sessions
+
+        Returns:
+            dict: active_sessions, risk_counts, risk_distribution, mean_score,
+                alerts (newest first) and computed_at
+        """
+        snapshot = self._snapshot
+        if self.clock() - snapshot["computed_at"] > self.refresh_interval:
+            # Expire idle sessions; if a writer holds the lock it is about to
+            # publish a fresh snapshot anyway
+            if self._lock.acquire(blocking=False):
+                try:
+                    self._snapshot = self._build()
+                finally:
+                    self._lock.release()
+        return self._snapshot
+
+    def _build(self):
+        """Snapshot the running aggregates (lock held)"""
+        now = self.clock()
+        cutoff = now - self.ttl
+        if now - self._expired_at > self.refresh_interval:
+            # Drop idle sessions and recount from scratch, which also clears
+            # float drift in the running score sum
+            self._expired_at = now
+            self._sessions = {sid: status for sid, status in self._sessions.items()
+                              if status["updated_at"] >= cutoff}
+            self._risk_counts = dict.fromkeys(RISK_LEVELS, 0)
+            self._score_sum = 0.0
+            for status in self._sessions.values():
+                self._risk_counts[status["risk_level"]] += 1
+                self._score_sum += status["score"]
+
+        alerts = tuple(alert for alert in self._alerts if alert["time"] >= cutoff)
+        return _make_snapshot(dict(self._risk_counts), self._score_sum, alerts, now)
+
+
+class SQLiteStatusStore(LiveStatusStore):
+    """
+    Live status store shared by several server processes through one SQLite
+    database in WAL mode
+
+    Writes go straight to the database; each process caches the aggregate
+    snapshot for refresh_interval seconds, so dashboard reads rarely touch
+    the database. Reads only run SELECTs, which WAL lets run alongside
+    writers; expired rows are purged by writers, at most once per
+    refresh_interval.
+    """
+
+    def __init__(self, path, ttl=900, max_alerts=50, refresh_interval=1.0, clock=time.time):
+        """
+        Args:
+            path (str): SQLite database file
+            ttl (float): Seconds after its last update that a session stops counting
+            max_alerts (int): Number of recent alerts returned
+            refresh_interval (float): Seconds a process reuses its snapshot
+            clock (callable): Wall-clock time source
+        """
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connection() as connection:
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS live_status (
+                    session_id TEXT PRIMARY KEY,
+                    score REAL NOT NULL,
+                    risk_level INTEGER NOT NULL,
+                    speed REAL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS live_status_updated_at ON live_status (updated_at);
+                CREATE TABLE IF NOT EXISTS live_alerts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    time REAL NOT NULL,
+                    session_id TEXT NOT NULL,
+                    score REAL NOT NULL,
+                    risk_level INTEGER NOT NULL,
+                    speed REAL
+                );
+            """)
+        self._purged_at = float("-inf")
+        super().__init__(ttl=ttl, max_alerts=max_alerts, refresh_interval=refresh_interval, clock=clock)
+
+    def _connection(self):
+        """One connection per thread (sqlite3 connections are not shared)"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def publish(self, session_id, score, risk_level, speed=None):
+        now = self.clock()
+        risk_level = int(risk_level)
+        with self._connection() as connection:
+            # Read the previous level and write in one transaction
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT risk_level FROM live_status WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            connection.execute(
+                "INSERT INTO live_status (session_id, score, risk_level, speed, updated_at) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT(session_id) DO UPDATE SET "
+                "score = excluded.score, risk_level = excluded.risk_level, "
+                "speed = excluded.speed, updated_at = excluded.updated_at",
+                (session_id, float(score), risk_level, speed, now),
+            )
+            if risk_level > 0 and (row is None or row[0] < risk_level):
+                connection.execute(
+                    "INSERT INTO live_alerts (time, session_id, score, risk_level, speed) VALUES (?, ?, ?, ?, ?)",
+                    (now, session_id, float(score), risk_level, speed),
+                )
+            if now - self._purged_at > self.refresh_interval:
+                # Writers already hold the write lock; readers never delete
+                self._purged_at = now
+                connection.execute("DELETE FROM live_status WHERE updated_at < ?", (now - self.ttl,))
+                connection.execute("DELETE FROM live_alerts WHERE time < ?", (now - self.ttl,))
+
+    def remove(self, session_id):
+        with self._connection() as connection:
+            connection.execute("DELETE FROM live_status WHERE session_id = ?", (session_id,))
+
+    def _build(self):
+        """Aggregate live sessions from the database (read-only)"""
+        now = self.clock()
+        cutoff = now - self.ttl
+        connection = self._connection()
+        rows = connection.execute(
+            "SELECT risk_level, COUNT(*), SUM(score) FROM live_status "
+            "WHERE updated_at >= ? GROUP BY risk_level", (cutoff,)
+        ).fetchall()
+        alert_rows = connection.execute(
+            "SELECT time, session_id, score, risk_level, speed FROM live_alerts "
+            "WHERE time >= ? ORDER BY id DESC LIMIT ?", (cutoff, self.max_alerts)
+        ).fetchall()
+
+        risk_counts = dict.fromkeys(RISK_LEVELS, 0)
+        score_sum = 0.0
+        for risk_level, count, level_score_sum in rows:
+            risk_counts[risk_level] = count
+            score_sum += level_score_sum
+
+        alerts = tuple(
+            {"time": time_, "session_id": session_id, "score": score, "risk_level": risk_level, "speed": speed}
+            for time_, session_id, score, risk_level, speed in alert_rows
+        )
+        return _make_snapshot(risk_counts, score_sum, alerts, now)
+
+
+def _make_snapshot(risk_counts, score_sum, alerts, computed_at):
+    active = sum(risk_counts.values())
+    return {
+        "active_sessions": active,
+        "risk_counts": risk_counts,
+        "risk_distribution": {level: count / active if active else 0.0 for level, count in risk_counts.items()},
+        "mean_score": score_sum / active if active else None,
+        "alerts": alerts,
+        "computed_at": computed_at,
+    }
@@ -5,14 +5,382 @@ Calculates safety scores and predicts driver risk levels
 
 import pandas as pd
 import numpy as np
+import sklearn
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import SGDClassifier
 from sklearn.model_selection import train_test_split
+from sklearn.metrics import accuracy_score
 from sklearn.preprocessing import StandardScaler
+import joblib
+import hashlib
+import json
+import os
+import pickle
+import struct
+import time
+import uuid
 import warnings
 
+from inference import CompiledForest
+from instrumentation import instrument_class
+from utils import NO_VIOLATION
+
 warnings.filterwarnings("ignore")
 
+# Bump when the artifact layout changes; older artifacts are rejected
+ARTIFACT_FORMAT_VERSION = 1
+
+# Features of the citizen simulator model in app.py
+CITIZEN_FEATURES = ["speed", "braking", "peak_hour"]
+
+
+def feature_hash(feature_columns):
+    """
+    Fingerprint an ordered list of feature columns
+    
+    Args:
+        feature_columns (list): Feature names in model input order
+        
+    Returns:
+        str: Short hex digest
+    """
+    return hashlib.sha256(json.dumps(list(feature_columns)).encode("utf-8")).hexdigest()[:16]
+
+
+def save_artifact(path, model, scaler, feature_columns, metadata=None):
+    """
+    Save a trained model and its scaler as a versioned artifact
+    
+    Args:
+        path (str): Output file path
+        model: Fitted sklearn estimator
+        scaler: Fitted scaler, or None
+        feature_columns (list): Feature names in model input order
+        metadata (dict): Extra JSON-friendly information (e.g. accuracy)
+        
+    Returns:
+        str: Model version stored in the artifact
+    """
+    model_version = uuid.uuid4().hex[:12]
+    artifact = {
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "feature_columns": list(feature_columns),
+        "feature_hash": feature_hash(feature_columns),
+        "model_version": model_version,
+        "sklearn_version": sklearn.__version__,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "metadata": metadata or {},
+        "model": model,
+        "scaler": scaler,
+    }
+    
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    
+    # Write then rename so concurrent workers never read a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(artifact, tmp_path)
+    os.replace(tmp_path, path)
+    
+    return model_version
+
+
+def load_artifact(path, feature_columns):
+    """
+    Load an artifact written by save_artifact and check its schema
+    
+    Args:
+        path (str): Artifact file path
+        feature_columns (list): Feature names the caller will feed the model
+        
+    Returns:
+        dict: Artifact with model, scaler, model_version and metadata
+        
+    Raises:
+        ValueError: If the artifact cannot be unpickled here, or its format,
+            scikit-learn version or feature schema does not match
+    """
+    try:
+        artifact = joblib.load(path)
+    except (pickle.UnpicklingError, EOFError, ImportError, AttributeError, IndexError,
+            TypeError, ValueError) as e:
+        # Typically written by other numpy, joblib or scikit-learn versions
+        raise ValueError(f"Cannot load artifact {path}: {e!r}") from e
+    if not isinstance(artifact, dict):
+        raise ValueError(f"Not a Salmeen artifact: {path}")
+    
+    if artifact.get("format_version") != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format: {artifact.get('format_version')}")
+    # Pickled estimators are only reliable on the scikit-learn that wrote them
+    if artifact.get("sklearn_version") != sklearn.__version__:
+        raise ValueError(
+            f"Artifact was saved with scikit-learn {artifact.get('sklearn_version')}, "
+            f"running {sklearn.__version__}"
+        )
+    if artifact.get("feature_hash") != feature_hash(feature_columns):
+        raise ValueError(
+            f"Artifact features {artifact.get('feature_columns')} do not match {list(feature_columns)}"
+        )
+    
+    return artifact
+
+
+def train_citizen_model(n_samples=1000):
+    """
+    Train the speed/braking risk model behind the citizen simulator
+    
+    Args:
+        n_samples (int): Number of synthetic training samples
+        
+    Returns:
+        tuple: Fitted RandomForestClassifier and its held-out accuracy
+    """
+    np.random.seed(42)
+    speed = np.random.normal(90, 20, n_samples)
+    braking = np.random.randint(0, 10, n_samples)
+    peak_hour = np.random.randint(0, 2, n_samples)
+    X = pd.DataFrame({'speed': speed, 'braking': braking, 'peak_hour': peak_hour})
+    y = np.zeros(n_samples, dtype=int)
+    y[(speed > 100) | (braking > 3)] = 1
+    y[(speed > 120) | (braking > 5)] = 2
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2)
+    model = RandomForestClassifier(n_estimators=50)
+    model.fit(X_train, y_train)
+    acc = accuracy_score(y_test, model.predict(X_test))
+    return model, acc
+
+
+def violation_mask(violation_type):
+    """
+    Mask of records with a traffic violation
+    
+    Categorical columns (see utils.to_compact) are compared on their integer
+    codes instead of the Arabic strings.
+    
+    Args:
+        violation_type (pd.Series): violation_type column
+        
+    Returns:
+        pd.Series: True where the record has a violation
+    """
+    if isinstance(violation_type.dtype, pd.CategoricalDtype):
+        categories = violation_type.cat.categories
+        if NO_VIOLATION in categories:
+            codes = violation_type.cat.codes.to_numpy()
+            return pd.Series(codes != categories.get_loc(NO_VIOLATION), index=violation_type.index)
+    return violation_type != NO_VIOLATION
+
+
+def aggregate_driver_stats(logs, by):
+    """
+    Reduce driving logs to per-driver sufficient statistics in one groupby pass
+    
+    Args:
+        logs (pd.DataFrame): Driving logs for many drivers
+        by (str or list): Column name(s) or key Series identifying the driver
+        
+    Returns:
+        pd.DataFrame: One row per driver with record, speeding, over-limit,
+            harsh braking, phone usage, violation and speed totals
+    """
+    keys = [logs[key] if isinstance(key, str) else key
+            for key in (by if isinstance(by, list) else [by])]
+    speeding = logs["speed_kmh"] > logs["speed_limit"]
+    over_limit = (logs["speed_kmh"] - logs["speed_limit"]).astype("float64")
+    stats = pd.DataFrame({
+        "records": 1,
+        "speeding": speeding.astype("int64"),
+        "over_limit_sum": over_limit.where(speeding, 0.0),
+        "harsh_braking": logs["harsh_braking"].astype("int64"),
+        "phone_usage": logs["phone_usage"].astype("int64"),
+        "violations": violation_mask(logs["violation_type"]).astype("int64"),
+        "speed_sum": logs["speed_kmh"].astype("float64"),
+        "speed_max": logs["speed_kmh"].astype("float64"),
+        "delta_sum": over_limit,
+    }, index=logs.index)
+    
+    aggregations = {column: "sum" for column in stats.columns}
+    aggregations["speed_max"] = "max"
+    return stats.groupby(keys, sort=True).agg(aggregations)
+
+
+def merge_driver_stats(*partials):
+    """
+    Combine aggregate_driver_stats outputs from different chunks, shards or
+    time windows into the statistics of their union
+    
+    Args:
+        *partials (pd.DataFrame): Outputs of aggregate_driver_stats (None is skipped)
+        
+    Returns:
+        pd.DataFrame: Merged per-driver statistics
+    """
+    partials = [partial for partial in partials if partial is not None]
+    combined = pd.concat(partials)
+    return rollup_driver_stats(combined, level=list(range(combined.index.nlevels)))
+
+
+def rollup_driver_stats(stats, level=0):
+    """
+    Combine aggregate_driver_stats rows up to coarser keys, e.g. trips to drivers
+    
+    Args:
+        stats (pd.DataFrame): Output of aggregate_driver_stats
+        level (int, str or list): Index level(s) to keep
+        
+    Returns:
+        pd.DataFrame: Statistics per remaining key
+    """
+    aggregations = {column: "sum" for column in stats.columns}
+    aggregations["speed_max"] = "max"
+    return stats.groupby(level=level, sort=True).agg(aggregations)
+
+
+def aggregate_trip_stats(logs, by="driver_id", trip="trip_id"):
+    """
+    Per-trip and per-driver statistics from one pass over the events
+    
+    Args:
+        logs (pd.DataFrame): Sessionized driving logs (see utils.sessionize)
+        by (str): Column identifying the driver
+        trip (str): Column identifying the trip
+        
+    Returns:
+        tuple: (trip statistics indexed by driver and trip,
+            driver statistics rolled up from the trips)
+    """
+    trips = aggregate_driver_stats(logs, [by, trip])
+    return trips, rollup_driver_stats(trips, level=by)
+
+
+def _score_from_counts(base_score, records, speeding, over_limit_sum,
+                       harsh_braking, phone_usage, violations):
+    """Apply calculate_score's penalties to scalar or array statistics"""
+    score = np.full(np.shape(records), float(base_score))
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Only speeding drivers have an average; scalar inputs would raise on 0 / 0
+        avg_over_limit = np.divide(over_limit_sum, speeding, out=np.zeros(np.shape(speeding)),
+                                   where=np.asarray(speeding) > 0)
+        speeding_penalty = np.minimum(30, (speeding / records) * 40 + avg_over_limit * 0.2)
+        score -= np.where(speeding > 0, speeding_penalty, 0.0)
+        score -= np.minimum(20, (harsh_braking / records) * 50)
+        score -= np.minimum(25, (phone_usage / records) * 60)
+        score -= np.minimum(25, (violations / records) * 50)
+    
+    # Drivers without records keep the base score, like calculate_score
+    return np.where(records > 0, np.clip(score, 0, 100), base_score)
+
+
+class CitizenPredictionTable:
+    """Citizen model predictions precomputed over the simulator's slider grid"""
+    
+    def __init__(self, model, speeds=range(60, 161), brakings=range(0, 11), peak_hour=1):
+        """
+        Args:
+            model: Fitted citizen model (see train_citizen_model)
+            speeds (range): Integer speeds offered by the speed slider
+            brakings (range): Integer harsh-braking counts offered by the slider
+            peak_hour (int): Peak-hour flag used by the simulator
+        """
+        self.model = model
+        self.engine = CompiledForest.from_sklearn(model)
+        self.speeds = speeds
+        self.brakings = brakings
+        self.peak_hour = peak_hour
+        
+        speed_grid, braking_grid = np.meshgrid(speeds, brakings, indexing="ij")
+        X = pd.DataFrame({
+            "speed": speed_grid.ravel(),
+            "braking": braking_grid.ravel(),
+            "peak_hour": peak_hour,
+        })[CITIZEN_FEATURES]
+        self.table = self.engine.predict(X).reshape(len(speeds), len(brakings))
+    
+    def predict(self, speed, braking):
+        """
+        Look up the risk code for one slider position
+        
+        Args:
+            speed (float): Average speed (km/h)
+            braking (float): Harsh-braking count
+            
+        Returns:
+            int: Risk code (0: safe, 1: medium, 2: high)
+        """
+        # Only whole numbers are grid points (100.0 is, 100.5 is not)
+        if float(speed).is_integer() and float(braking).is_integer():
+            speed, braking = int(speed), int(braking)
+            if speed in self.speeds and braking in self.brakings:
+                return self.table[speed - self.speeds.start, braking - self.brakings.start]
+        # Outside the precomputed grid: evaluate the compiled forest
+        return self.engine.predict([speed, braking, self.peak_hour])[0]
+
+
+class DriverFeatures:
+    """
+    Everything the scorer, predictor and coach read from one driver's logs,
+    computed in a single pass
+    
+    SafetyScoreCalculator.calculate_score, RiskPredictor.predict /
+    prepare_features and AICoach.generate_recommendations accept it in
+    place of the DataFrame and return exactly the same results.
+    """
+    
+    __slots__ = ("records", "speeding", "speeding_over_limit", "harsh_braking",
+                 "phone_usage", "violations", "avg_speed", "max_speed",
+                 "avg_over_limit", "top_location", "top_violation")
+    
+    @classmethod
+    def from_logs(cls, driver_data):
+        """
+        Scan a driver's logs once
+        
+        Args:
+            driver_data (pd.DataFrame): Driver's driving logs
+        
+        Returns:
+            DriverFeatures: Shared per-driver features
+        """
+        features = cls()
+        speed = driver_data["speed_kmh"]
+        over_limit = speed - driver_data["speed_limit"]
+        speeding = speed > driver_data["speed_limit"]
+        violations = violation_mask(driver_data["violation_type"])
+        
+        features.records = len(driver_data)
+        features.speeding = speeding.sum()
+        features.speeding_over_limit = over_limit[speeding].mean()
+        features.harsh_braking = driver_data["harsh_braking"].sum()
+        features.phone_usage = driver_data["phone_usage"].sum()
+        features.violations = violations.sum()
+        features.avg_speed = speed.mean()
+        features.max_speed = speed.max()
+        features.avg_over_limit = over_limit.mean()
+        
+        # Coaching triggers: most common speeding location and violation
+        features.top_location = None
+        if features.speeding > 0:
+            most_common_location = driver_data.loc[speeding, "location_name"].mode()
+            if len(most_common_location) > 0:
+                features.top_location = most_common_location.iloc[0]
+        features.top_violation = None
+        if features.violations > 0:
+            features.top_violation = driver_data.loc[violations, "violation_type"].value_counts().index[0]
+        
+        return features
+    
+    def __len__(self):
+        return self.records
+    
+    def __repr__(self):
+        return (f"DriverFeatures(records={self.records}, speeding={self.speeding}, "
+                f"harsh_braking={self.harsh_braking}, phone_usage={self.phone_usage}, "
+                f"violations={self.violations})")
 
+
+@instrument_class
 class SafetyScoreCalculator:
     """Calculate driver safety score based on driving behavior"""
     
@@ -24,7 +392,8 @@ class SafetyScoreCalculator:
         Calculate safety score for a driver based on their driving logs
         
         Args:
-            driver_data (pd.DataFrame): DataFrame with driver's driving logs
+            driver_data (pd.DataFrame or DriverFeatures): Driver's driving logs,
+                or their precomputed features
             
         Returns:
             float: Safety score (0-100)
@@ -34,6 +403,9 @@ class SafetyScoreCalculator:
         if len(driver_data) == 0:
             return score
         
+        if isinstance(driver_data, DriverFeatures):
+            return self._score_features(driver_data)
+        
         # Penalty for speeding
         speeding_violations = driver_data[driver_data["speed_kmh"] > driver_data["speed_limit"]]
         if len(speeding_violations) > 0:
@@ -54,7 +426,7 @@ class SafetyScoreCalculator:
         score -= phone_usage_penalty
         
         # Penalty for violations
-        violations = driver_data[driver_data["violation_type"] != "لا يوجد"]
+        violations = driver_data[violation_mask(driver_data["violation_type"])]
         violation_penalty = min(25, (len(violations) / len(driver_data)) * 50)
         score -= violation_penalty
         
@@ -63,6 +435,69 @@ class SafetyScoreCalculator:
         
         return round(score, 1)
     
+    def _score_features(self, features):
+        """calculate_score on precomputed DriverFeatures"""
+        score = self.base_score
+        records = features.records
+        
+        if features.speeding > 0:
+            score -= min(30, (features.speeding / records) * 40 + features.speeding_over_limit * 0.2)
+        score -= min(20, (features.harsh_braking / records) * 50)
+        score -= min(25, (features.phone_usage / records) * 60)
+        score -= min(25, (features.violations / records) * 50)
+        
+        return round(max(0, min(100, score)), 1)
+    
+    def scores_from_stats(self, stats):
+        """
+        Calculate safety scores from per-driver sufficient statistics
+        
+        Applies exactly the same penalties, caps and rounding as
+        calculate_score, but on whole columns at once.
+        
+        Args:
+            stats (pd.DataFrame): Output of aggregate_driver_stats
+            
+        Returns:
+            pd.Series: Safety score (0-100) per driver
+        """
+        score = _score_from_counts(
+            self.base_score,
+            stats["records"].to_numpy(dtype="float64"),
+            stats["speeding"].to_numpy(dtype="float64"),
+            stats["over_limit_sum"].to_numpy(dtype="float64"),
+            stats["harsh_braking"].to_numpy(dtype="float64"),
+            stats["phone_usage"].to_numpy(dtype="float64"),
+            stats["violations"].to_numpy(dtype="float64"),
+        )
+        
+        return pd.Series(np.round(score, 1), index=stats.index, name="score")
+    
+    def calculate_scores(self, logs=None, by="driver_id", stats=None):
+        """
+        Calculate safety scores for every driver in a fleet-wide log frame
+        
+        Args:
+            logs (pd.DataFrame): Driving logs for many drivers
+            by (str): Column identifying the driver
+            stats (pd.DataFrame): Precomputed aggregate_driver_stats output,
+                used instead of logs when given
+            
+        Returns:
+            pd.DataFrame: Score, category and color per driver
+        """
+        if stats is None:
+            stats = aggregate_driver_stats(logs, by)
+        scores = self.scores_from_stats(stats)
+        values = scores.to_numpy()
+        bands = [values >= 85, values >= 70, values >= 50]
+        
+        return pd.DataFrame({
+            "score": scores,
+            "category": np.select(bands, ["ممتاز", "جيد", "متوسط"], default="ضعيف"),
+            "color": np.select(bands, ["#00C851", "#ffbb33", "#ff8800"], default="#ff4444"),
+        }, index=scores.index)
+    
     def get_score_category(self, score):
         """
         Get category label for a safety score
@@ -102,78 +537,372 @@ class SafetyScoreCalculator:
             return "#ff4444"  # Red
 
 
+class ScoreAccumulator:
+    """Online safety score for one driver, updated record by record"""
+    
+    __slots__ = ("records", "speeding", "over_limit_sum",
+                 "harsh_braking", "phone_usage", "violations")
+    
+    # records, speeding, harsh braking, phone usage, violations, over-limit sum
+    _FORMAT = struct.Struct("<5Qd")
+    
+    def __init__(self, records=0, speeding=0, over_limit_sum=0.0,
+                 harsh_braking=0, phone_usage=0, violations=0):
+        self.records = records
+        self.speeding = speeding
+        self.over_limit_sum = over_limit_sum
+        self.harsh_braking = harsh_braking
+        self.phone_usage = phone_usage
+        self.violations = violations
+    
+    @classmethod
+    def from_logs(cls, driver_data):
+        """
+        Build an accumulator from a block of driving logs
+        
+        Args:
+            driver_data (pd.DataFrame): Driver's driving logs
+            
+        Returns:
+            ScoreAccumulator: Accumulator holding the logs' statistics
+        """
+        over_limit = driver_data["speed_kmh"] - driver_data["speed_limit"]
+        speeding = over_limit > 0
+        return cls(
+            records=len(driver_data),
+            speeding=int(speeding.sum()),
+            over_limit_sum=float(over_limit[speeding].sum()),
+            harsh_braking=int(driver_data["harsh_braking"].sum()),
+            phone_usage=int(driver_data["phone_usage"].sum()),
+            violations=int(violation_mask(driver_data["violation_type"]).sum()),
+        )
+    
+    def update(self, record):
+        """
+        Add one driving record
+        
+        Args:
+            record (dict): Driving log row with the driving_data.csv fields
+        """
+        over_limit = record["speed_kmh"] - record["speed_limit"]
+        self.records += 1
+        if over_limit > 0:
+            self.speeding += 1
+            self.over_limit_sum += float(over_limit)
+        self.harsh_braking += int(record["harsh_braking"])
+        self.phone_usage += int(record["phone_usage"])
+        self.violations += int(record["violation_type"] != NO_VIOLATION)
+    
+    def merge(self, other):
+        """
+        Fold another accumulator (shard or time window) into this one
+        
+        Args:
+            other (ScoreAccumulator): Partial statistics for the same driver
+            
+        Returns:
+            ScoreAccumulator: self, for chaining
+        """
+        self.records += other.records
+        self.speeding += other.speeding
+        self.over_limit_sum += other.over_limit_sum
+        self.harsh_braking += other.harsh_braking
+        self.phone_usage += other.phone_usage
+        self.violations += other.violations
+        return self
+    
+    def __add__(self, other):
+        return ScoreAccumulator.from_bytes(self.to_bytes()).merge(other)
+    
+    def score(self, calculator=None):
+        """
+        Current safety score, identical to calculate_score over all records seen
+        
+        Args:
+            calculator (SafetyScoreCalculator): Calculator providing the base score
+            
+        Returns:
+            float: Safety score (0-100)
+        """
+        base_score = (calculator or SafetyScoreCalculator()).base_score
+        if self.records == 0:
+            return base_score
+        score = _score_from_counts(
+            base_score, float(self.records), float(self.speeding), self.over_limit_sum,
+            float(self.harsh_braking), float(self.phone_usage), float(self.violations),
+        )
+        return float(np.round(score, 1))
+    
+    def to_bytes(self):
+        """
+        Serialize to a fixed 48-byte record
+        
+        Returns:
+            bytes: Packed statistics
+        """
+        return self._FORMAT.pack(self.records, self.speeding, self.harsh_braking,
+                                 self.phone_usage, self.violations, self.over_limit_sum)
+    
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Restore an accumulator serialized with to_bytes
+        
+        Args:
+            data (bytes): Packed statistics
+            
+        Returns:
+            ScoreAccumulator: Restored accumulator
+        """
+        records, speeding, harsh_braking, phone_usage, violations, over_limit_sum = \
+            cls._FORMAT.unpack(data)
+        return cls(records, speeding, over_limit_sum, harsh_braking, phone_usage, violations)
+    
+    def __repr__(self):
+        return (f"ScoreAccumulator(records={self.records}, speeding={self.speeding}, "
+                f"over_limit_sum={self.over_limit_sum}, harsh_braking={self.harsh_braking}, "
+                f"phone_usage={self.phone_usage}, violations={self.violations})")
+
+
+@instrument_class
 class RiskPredictor:
     """Predict driver risk level using ML"""
     
-    def __init__(self):
-        self.model = RandomForestClassifier(n_estimators=100, random_state=42, max_depth=10)
+    FEATURE_COLUMNS = [
+        "avg_speed", "max_speed", "speed_violations_rate", "harsh_braking_rate",
+        "phone_usage_rate", "violation_rate", "avg_over_limit",
+    ]
+    
+    MODEL_TYPES = ("forest", "sgd")
+    
+    def __init__(self, n_jobs=-1, model_type="forest", max_trees=300):
+        """
+        Args:
+            n_jobs (int): Parallel jobs for fitting forests
+            model_type (str): "forest" (RandomForestClassifier) or "sgd"
+                (logistic SGDClassifier, updated with partial_fit)
+            max_trees (int): Tree budget for incremental forest updates;
+                the oldest trees are retired beyond it
+        """
+        if model_type not in self.MODEL_TYPES:
+            raise ValueError(f"model_type must be one of {self.MODEL_TYPES}")
+        self.model_type = model_type
+        self.model = self._new_model()
         self.scaler = StandardScaler()
+        self.n_jobs = n_jobs
+        self.max_trees = max_trees
         self.is_trained = False
+        self.model_version = None
+        self.engine = None
+    
+    def _new_model(self, n_estimators=100):
+        if self.model_type == "sgd":
+            return SGDClassifier(loss="log_loss", random_state=42)
+        return RandomForestClassifier(n_estimators=n_estimators, random_state=42, max_depth=10)
         
     def prepare_features(self, df):
         """
         Prepare features for ML model
         
         Args:
-            df (pd.DataFrame): Raw driving data
+            df (pd.DataFrame or DriverFeatures): Raw driving data, or its
+                precomputed features
             
         Returns:
             dict: Feature dictionary
         """
+        if isinstance(df, DriverFeatures):
+            return {
+                "avg_speed": df.avg_speed,
+                "max_speed": df.max_speed,
+                "speed_violations_rate": df.speeding / df.records,
+                "harsh_braking_rate": df.harsh_braking / df.records,
+                "phone_usage_rate": df.phone_usage / df.records,
+                "violation_rate": df.violations / df.records,
+                "avg_over_limit": df.avg_over_limit,
+            }
+        
         features = {
             "avg_speed": df["speed_kmh"].mean(),
             "max_speed": df["speed_kmh"].max(),
             "speed_violations_rate": (df["speed_kmh"] > df["speed_limit"]).sum() / len(df),
             "harsh_braking_rate": df["harsh_braking"].sum() / len(df),
             "phone_usage_rate": df["phone_usage"].sum() / len(df),
-            "violation_rate": (df["violation_type"] != "لا يوجد").sum() / len(df),
+            "violation_rate": violation_mask(df["violation_type"]).sum() / len(df),
             "avg_over_limit": (df["speed_kmh"] - df["speed_limit"]).mean()
         }
         
         return features
     
-    def train(self, df):
+    def features_from_stats(self, stats):
         """
-        Train the risk prediction model
+        Build the feature matrix from per-driver sufficient statistics
         
         Args:
-            df (pd.DataFrame): Training data with driver_profile column
+            stats (pd.DataFrame): Output of aggregate_driver_stats
+            
+        Returns:
+            pd.DataFrame: One feature row per driver, same columns as prepare_features
+        """
+        records = stats["records"]
+        features = pd.DataFrame({
+            "avg_speed": stats["speed_sum"] / records,
+            "max_speed": stats["speed_max"],
+            "speed_violations_rate": stats["speeding"] / records,
+            "harsh_braking_rate": stats["harsh_braking"] / records,
+            "phone_usage_rate": stats["phone_usage"] / records,
+            "violation_rate": stats["violations"] / records,
+            "avg_over_limit": stats["delta_sum"] / records,
+        }, index=stats.index)
+        
+        return features[self.FEATURE_COLUMNS]
+    
+    def _training_set(self, df):
         """
-        # Group by driver profile and create features
-        X_list = []
-        y_list = []
+        Build one labelled feature row per driver from driving logs
         
-        # Create synthetic driver groups for training
-        for profile in df["driver_profile"].unique():
-            profile_data = df[df["driver_profile"] == profile]
+        Args:
+            df (pd.DataFrame): Logs with driver_profile (and driver_id) columns
             
-            # Split into chunks to simulate different drivers
+        Returns:
+            tuple: Feature matrix and 0/1 labels (1: risky)
+        """
+        profile = pd.Series(pd.factorize(df["driver_profile"])[0], index=df.index, name="profile")
+        if "driver_id" in df.columns:
+            # One sample per real driver (a driver keeps a single profile)
+            keys = [profile, df["driver_id"]]
+        else:
+            # Logs without identities: split each profile into chunks of
+            # 20 records to simulate different drivers
             chunk_size = 20
-            for i in range(0, len(profile_data), chunk_size):
-                chunk = profile_data.iloc[i:i+chunk_size]
-                if len(chunk) >= 10:  # Minimum records
-                    features = self.prepare_features(chunk)
-                    X_list.append(features)
-                    y_list.append(1 if profile == "risky" else 0)
+            chunk = df.groupby(profile, sort=False).cumcount() // chunk_size
+            keys = [profile, chunk.rename("chunk")]
         
-        X = pd.DataFrame(X_list)
-        y = np.array(y_list)
+        stats = aggregate_driver_stats(df, keys)
+        stats = stats[stats["records"] >= 10]  # Minimum records
+        
+        X = self.features_from_stats(stats).reset_index(drop=True)
+        profiles = df["driver_profile"].unique()
+        y = (profiles[stats.index.get_level_values("profile")] == "risky").astype(int)
+        return X, y
+    
+    def train(self, df):
+        """
+        Train the risk prediction model
+        
+        Args:
+            df (pd.DataFrame): Training data with driver_profile (and driver_id) columns
+        """
+        X, y = self._training_set(df)
         
         # Train model
         if len(X) > 10:
             X_scaled = self.scaler.fit_transform(X)
-            self.model.fit(X_scaled, y)
+            self._fit(self.model, X_scaled, y)
+            self._compile()
             self.is_trained = True
+            self.model_version = uuid.uuid4().hex[:12]
             print(f"✅ Model trained on {len(X)} samples")
         else:
             print("⚠️ Not enough data to train model")
     
+    def update(self, df, n_new_trees=20):
+        """
+        Update a trained model with new labelled logs only, without refitting
+        on the full history
+        
+        A forest gains n_new_trees trees fitted on the new data and retires
+        its oldest trees beyond max_trees; an SGD model takes one
+        partial_fit step. The scaler stays fixed so earlier trees and
+        weights keep their meaning.
+        
+        Args:
+            df (pd.DataFrame): New training data with driver_profile column
+            n_new_trees (int): Trees to add (forest only)
+            
+        Returns:
+            bool: True when the model was updated
+        """
+        if not self.is_trained:
+            raise ValueError("Cannot update an untrained RiskPredictor; call train() first")
+        
+        X, y = self._training_set(df)
+        if len(X) == 0 or (self.model_type == "forest" and len(np.unique(y)) < 2):
+            print("⚠️ Not enough data to update model")
+            return False
+        X_scaled = self.scaler.transform(X)
+        
+        if self.model_type == "sgd":
+            self.model.partial_fit(X_scaled, y)
+        else:
+            new_trees = self._new_model(n_estimators=n_new_trees)
+            self._fit(new_trees, X_scaled, y)
+            estimators = (self.model.estimators_ + new_trees.estimators_)[-self.max_trees:]
+            self.model.estimators_ = estimators
+            self.model.n_estimators = len(estimators)
+        
+        self._compile()
+        self.model_version = uuid.uuid4().hex[:12]
+        print(f"✅ Model updated on {len(X)} samples")
+        return True
+    
+    def _fit(self, model, X_scaled, y):
+        """Fit a fresh model; forests fit their trees in parallel"""
+        if self.model_type == "sgd":
+            model.fit(X_scaled, y)
+            return
+        # Fit trees in parallel, but keep single-row prediction free of
+        # worker dispatch overhead
+        model.set_params(n_jobs=self.n_jobs)
+        model.fit(X_scaled, y)
+        model.set_params(n_jobs=None)
+    
+    def _compile(self):
+        """Export forests to the compiled inference engine"""
+        if isinstance(self.model, RandomForestClassifier):
+            self.engine = CompiledForest.from_sklearn(self.model, self.scaler)
+        else:
+            self.engine = None
+    
+    def save(self, path):
+        """
+        Save the trained model and scaler as a versioned artifact
+        
+        Args:
+            path (str): Output file path
+        """
+        if not self.is_trained:
+            raise ValueError("Cannot save an untrained RiskPredictor")
+        self.model_version = save_artifact(path, self.model, self.scaler, self.FEATURE_COLUMNS)
+    
+    @classmethod
+    def load(cls, path):
+        """
+        Load a RiskPredictor saved with save(), without retraining
+        
+        Args:
+            path (str): Artifact file path
+            
+        Returns:
+            RiskPredictor: Trained predictor
+        """
+        artifact = load_artifact(path, cls.FEATURE_COLUMNS)
+        model_type = "forest" if isinstance(artifact["model"], RandomForestClassifier) else "sgd"
+        predictor = cls(model_type=model_type)
+        predictor.model = artifact["model"]
+        predictor.scaler = artifact["scaler"]
+        predictor.model_version = artifact["model_version"]
+        predictor._compile()
+        predictor.is_trained = True
+        return predictor
+    
     def predict(self, driver_data):
         """
         Predict risk level for a driver
         
         Args:
-            driver_data (pd.DataFrame): Driver's driving logs
+            driver_data (pd.DataFrame or DriverFeatures): Driver's driving logs,
+                or their precomputed features
             
         Returns:
             dict: Prediction result with risk level and confidence
@@ -186,27 +915,97 @@ class RiskPredictor:
                 "is_high_risk": False
             }
         
-        features = self.prepare_features(driver_data)
-        X = pd.DataFrame([features])
-        X_scaled = self.scaler.transform(X)
+        features = pd.DataFrame([self.prepare_features(driver_data)])
         
-        prediction = self.model.predict(X_scaled)[0]
-        probability = self.model.predict_proba(X_scaled)[0]
+        return self._predict_features(features).iloc[0].to_dict()
+    
+    def predict_many(self, logs=None, by="driver_id", features=None, stats=None):
+        """
+        Predict risk levels for many drivers with one scaler transform
+        and one forest evaluation
         
-        is_high_risk = bool(prediction == 1)
-        confidence = float(probability[prediction])
+        Args:
+            logs (pd.DataFrame): Driving logs for many drivers
+            by (str): Column identifying the driver in logs
+            features (pd.DataFrame): Precomputed feature matrix (one row per
+                driver), used instead of logs when given
+            stats (pd.DataFrame): Precomputed aggregate_driver_stats output,
+                used instead of logs when given
+            
+        Returns:
+            pd.DataFrame: Risk level, confidence and high-risk flag per driver,
+                same values as predict
+        """
+        if features is None:
+            if stats is None:
+                stats = aggregate_driver_stats(logs, by)
+            features = self.features_from_stats(stats)
+            enough_data = stats["records"] >= 10
+        else:
+            features = features[self.FEATURE_COLUMNS]
+            enough_data = pd.Series(True, index=features.index)
+        
+        result = pd.DataFrame({
+            "risk_level": "غير محدد",
+            "risk_level_en": "Unknown",
+            "confidence": 0.0,
+            "is_high_risk": False
+        }, index=features.index)
+        
+        if self.is_trained and enough_data.any():
+            result.loc[enough_data.to_numpy()] = self._predict_features(features[enough_data])
+        
+        return result
+    
+    def _predict_features(self, features):
+        """Score a feature matrix with one pass of the compiled forest (or the SGD model)"""
+        if self.engine is not None:
+            probability = self.engine.predict_proba(features.to_numpy(dtype="float64"))
+            classes = self.engine.classes_
+        else:
+            probability = self.model.predict_proba(self.scaler.transform(features))
+            classes = self.model.classes_
+        
+        best = probability.argmax(axis=1)
+        is_high_risk = classes[best] == 1
+        confidence = probability[np.arange(len(best)), best]
         
-        return {
-            "risk_level": "عالي الخطورة" if is_high_risk else "آمن",
-            "risk_level_en": "High Risk" if is_high_risk else "Safe",
-            "confidence": round(confidence * 100, 1),
+        return pd.DataFrame({
+            "risk_level": np.where(is_high_risk, "عالي الخطورة", "آمن"),
+            "risk_level_en": np.where(is_high_risk, "High Risk", "Safe"),
+            "confidence": np.round(confidence * 100, 1),
             "is_high_risk": is_high_risk
-        }
+        }, index=features.index)
 
 
+@instrument_class
 class AICoach:
     """Generate personalized driving recommendations"""
     
+    # Message templates, shared by the single-driver and fleet paths
+    NO_DATA_MESSAGE = "لا توجد بيانات كافية لتقديم توصيات"
+    SPEEDING_TEMPLATE = (
+        "⚠️ لاحظنا تجاوزاً متكرراً للسرعة في {location}. "
+        "يرجى الالتزام بالسرعة المحددة للحفاظ على سلامتك."
+    )
+    HARSH_BRAKING_MESSAGE = (
+        "🚗 معدل الفرملة المفاجئة مرتفع. حاول الحفاظ على مسافة آمنة مع المركبات الأمامية "
+        "وتوقع حركة المرور مسبقاً."
+    )
+    PHONE_USAGE_MESSAGE = (
+        "📱 تم رصد استخدام الجوال أثناء القيادة. استخدم نظام البلوتوث أو أوقف السيارة "
+        "في مكان آمن للرد على المكالمات."
+    )
+    VIOLATION_TEMPLATE = (
+        "⚡ تم رصد مخالفة: {violation}. يرجى الالتزام بقواعد المرور لتجنب الغرامات "
+        "والحفاظ على سلامتك وسلامة الآخرين."
+    )
+    EXCELLENT_MESSAGE = "✅ أداء ممتاز! استمر في القيادة الآمنة والالتزام بقواعد المرور."
+    GENERAL_MESSAGE = "✅ قيادتك جيدة بشكل عام. استمر في الالتزام بقواعد المرور والقيادة الآمنة."
+    
+    HARSH_BRAKING_THRESHOLD = 0.15
+    PHONE_USAGE_THRESHOLD = 0.05
+    
     def __init__(self):
         pass
     
@@ -215,68 +1014,143 @@ class AICoach:
         Generate personalized recommendations based on driving behavior
         
         Args:
-            driver_data (pd.DataFrame): Driver's driving logs
+            driver_data (pd.DataFrame or DriverFeatures): Driver's driving logs,
+                or their precomputed features
             safety_score (float): Current safety score
             
         Returns:
             list: List of recommendations in Arabic
         """
-        recommendations = []
-        
         if len(driver_data) == 0:
-            return ["لا توجد بيانات كافية لتقديم توصيات"]
+            return [self.NO_DATA_MESSAGE]
+        
+        if isinstance(driver_data, DriverFeatures):
+            return self._render(
+                driver_data.top_location,
+                driver_data.harsh_braking / driver_data.records,
+                driver_data.phone_usage / driver_data.records,
+                driver_data.top_violation,
+                safety_score,
+            )
         
         # Check speeding
+        top_location = None
         speeding_violations = driver_data[driver_data["speed_kmh"] > driver_data["speed_limit"]]
         if len(speeding_violations) > 0:
             most_common_location = speeding_violations["location_name"].mode()
             if len(most_common_location) > 0:
-                recommendations.append(
-                    f"⚠️ لاحظنا تجاوزاً متكرراً للسرعة في {most_common_location.iloc[0]}. "
-                    f"يرجى الالتزام بالسرعة المحددة للحفاظ على سلامتك."
-                )
-        
-        # Check harsh braking
-        harsh_braking_rate = driver_data["harsh_braking"].sum() / len(driver_data)
-        if harsh_braking_rate > 0.15:
-            recommendations.append(
-                "🚗 معدل الفرملة المفاجئة مرتفع. حاول الحفاظ على مسافة آمنة مع المركبات الأمامية "
-                "وتوقع حركة المرور مسبقاً."
-            )
-        
-        # Check phone usage
-        phone_usage_rate = driver_data["phone_usage"].sum() / len(driver_data)
-        if phone_usage_rate > 0.05:
-            recommendations.append(
-                "📱 تم رصد استخدام الجوال أثناء القيادة. استخدم نظام البلوتوث أو أوقف السيارة "
-                "في مكان آمن للرد على المكالمات."
-            )
+                top_location = most_common_location.iloc[0]
         
         # Check violations
-        violations = driver_data[driver_data["violation_type"] != "لا يوجد"]
+        top_violation = None
+        violations = driver_data[violation_mask(driver_data["violation_type"])]
         if len(violations) > 0:
-            violation_types = violations["violation_type"].value_counts()
-            most_common = violation_types.index[0]
-            recommendations.append(
-                f"⚡ تم رصد مخالفة: {most_common}. يرجى الالتزام بقواعد المرور لتجنب الغرامات "
-                f"والحفاظ على سلامتك وسلامة الآخرين."
+            top_violation = violations["violation_type"].value_counts().index[0]
+        
+        return self._render(
+            top_location,
+            driver_data["harsh_braking"].sum() / len(driver_data),
+            driver_data["phone_usage"].sum() / len(driver_data),
+            top_violation,
+            safety_score,
+        )
+    
+    def generate_fleet_recommendations(self, logs, by="driver_id", scores=None, batch_size=10_000):
+        """
+        Generate recommendations for every driver using grouped passes over the fleet logs
+        
+        Triggers (top speeding location, braking and phone rates, top violation)
+        are computed for all drivers at once; messages are then rendered from
+        the templates and streamed out batch by batch.
+        
+        Args:
+            logs (pd.DataFrame): Driving logs for many drivers
+            by (str): Column identifying the driver
+            scores (pd.Series): Safety score per driver (default: computed
+                with SafetyScoreCalculator.calculate_scores)
+            batch_size (int): Drivers per yielded batch
+            
+        Yields:
+            pd.Series: Recommendation list per driver
+        """
+        stats = aggregate_driver_stats(logs, by)
+        if scores is None:
+            scores = SafetyScoreCalculator().scores_from_stats(stats)
+        
+        speeding = logs["speed_kmh"] > logs["speed_limit"]
+        triggers = pd.DataFrame({
+            "top_location": _most_frequent(logs.loc[speeding, by], logs.loc[speeding, "location_name"]),
+            "harsh_braking_rate": stats["harsh_braking"] / stats["records"],
+            "phone_usage_rate": stats["phone_usage"] / stats["records"],
+            "top_violation": _most_frequent(
+                logs.loc[violation_mask(logs["violation_type"]), by],
+                logs.loc[violation_mask(logs["violation_type"]), "violation_type"],
+                ties="first",
+            ),
+            "score": scores,
+        }, index=stats.index)
+        
+        for start in range(0, len(triggers), batch_size):
+            batch = triggers.iloc[start:start + batch_size]
+            yield pd.Series(
+                [self._render(*row) for row in batch.itertuples(index=False, name=None)],
+                index=batch.index,
+                name="recommendations",
             )
+    
+    def _render(self, top_location, harsh_braking_rate, phone_usage_rate, top_violation, safety_score):
+        """Render recommendation messages from precomputed triggers"""
+        recommendations = []
+        
+        if not pd.isna(top_location):
+            recommendations.append(self.SPEEDING_TEMPLATE.format(location=top_location))
+        
+        if harsh_braking_rate > self.HARSH_BRAKING_THRESHOLD:
+            recommendations.append(self.HARSH_BRAKING_MESSAGE)
+        
+        if phone_usage_rate > self.PHONE_USAGE_THRESHOLD:
+            recommendations.append(self.PHONE_USAGE_MESSAGE)
+        
+        if not pd.isna(top_violation):
+            recommendations.append(self.VIOLATION_TEMPLATE.format(violation=top_violation))
         
         # Positive reinforcement
         if safety_score >= 85:
-            recommendations.append(
-                "✅ أداء ممتاز! استمر في القيادة الآمنة والالتزام بقواعد المرور."
-            )
+            recommendations.append(self.EXCELLENT_MESSAGE)
         
         # General advice if no specific issues
         if len(recommendations) == 0:
-            recommendations.append(
-                "✅ قيادتك جيدة بشكل عام. استمر في الالتزام بقواعد المرور والقيادة الآمنة."
-            )
+            recommendations.append(self.GENERAL_MESSAGE)
         
         return recommendations
 
 
+def _most_frequent(keys, values, ties="sorted"):
+    """
+    Most frequent value per key
+    
+    Args:
+        keys (pd.Series): Group key per row
+        values (pd.Series): Values to count
+        ties (str): "sorted" gives ties to the first value in sort order, as
+            Series.mode does; "first" gives them to the value seen first, as
+            Series.value_counts does (category order for categoricals)
+        
+    Returns:
+        pd.Series: Most frequent value per key
+    """
+    grouped = pd.DataFrame({"position": np.arange(len(values))}, index=values.index) \
+        .groupby([keys, values], observed=True, sort=True)["position"]
+    counts = pd.DataFrame({"count": grouped.size(), "first_seen": grouped.min()})
+    
+    if ties == "first" and not isinstance(values.dtype, pd.CategoricalDtype):
+        counts = counts.sort_values("first_seen", kind="stable")
+    counts = counts.sort_values("count", ascending=False, kind="stable")
+    
+    top = counts.index[~counts.index.get_level_values(0).duplicated()]
+    return pd.Series(top.get_level_values(1), index=top.get_level_values(0))
+
+
 if __name__ == "__main__":
     # Test the model
     from utils import generate_dummy_data
@@ -286,22 +1160,25 @@ if __name__ == "__main__":
     # Generate data
     df = generate_dummy_data(500)
     
+    # Scan the sample driver's logs once for all three components
+    sample_driver_data = df.head(50)
+    features = DriverFeatures.from_logs(sample_driver_data)
+    
     # Test safety score
     calculator = SafetyScoreCalculator()
-    sample_driver_data = df.head(50)
-    score = calculator.calculate_score(sample_driver_data)
+    score = calculator.calculate_score(features)
     category = calculator.get_score_category(score)
     print(f"\n📊 Safety Score: {score}/100 ({category})")
     
     # Test risk predictor
     predictor = RiskPredictor()
     predictor.train(df)
-    prediction = predictor.predict(sample_driver_data)
+    prediction = predictor.predict(features)
     print(f"🎯 Risk Prediction: {prediction['risk_level']} (Confidence: {prediction['confidence']}%)")
     
     # Test AI coach
     coach = AICoach()
-    recommendations = coach.generate_recommendations(sample_driver_data, score)
+    recommendations = coach.generate_recommendations(features, score)
     print(f"\n💡 AI Recommendations:")
     for rec in recommendations:
         print(f"  - {rec}")
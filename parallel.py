@@ -0,0 +1,144 @@
+"""
+Multi-Core Fleet Scoring for Salmeen Platform
+Shards driving logs by driver across a process pool through shared memory
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from model import SafetyScoreCalculator, aggregate_driver_stats, violation_mask
+from utils import NO_VIOLATION
+
+
+# Columns shipped to workers; violation_type travels as a 0/1 code
+SHARED_COLUMNS = ["driver", "speed_kmh", "speed_limit", "harsh_braking", "phone_usage", "violation"]
+
+_worker_predictor = None
+
+
+def _init_worker(predictor):
+    """Receive the (pickled once per worker) predictor"""
+    global _worker_predictor
+    _worker_predictor = predictor
+
+
+def _score_shard(layout, start, end):
+    """
+    Score the drivers whose rows sit in [start, end) of the shared columns
+
+    Args:
+        layout (dict): Column -> (shared memory name, dtype, length)
+        start (int): First row of the shard
+        end (int): Row after the last one of the shard
+
+    Returns:
+        pd.DataFrame: Scores, features and risk predictions per driver code
+    """
+    blocks = []
+    try:
+        columns = {}
+        for column, (name, dtype, length) in layout.items():
+            block = shared_memory.SharedMemory(name=name)
+            blocks.append(block)
+            columns[column] = np.ndarray(length, dtype=dtype, buffer=block.buf)[start:end]
+
+        shard = pd.DataFrame({
+            "driver": columns["driver"],
+            "speed_kmh": columns["speed_kmh"],
+            "speed_limit": columns["speed_limit"],
+            "harsh_braking": columns["harsh_braking"],
+            "phone_usage": columns["phone_usage"],
+            "violation_type": pd.Categorical.from_codes(
+                columns["violation"], categories=[NO_VIOLATION, "violation"]
+            ),
+        }, copy=False)
+        result = _score_frame(shard, _worker_predictor)
+        # Drop views into the shared blocks before closing them
+        del shard, columns
+        return result
+    finally:
+        for block in blocks:
+            block.close()
+
+
+def _score_frame(logs, predictor, by="driver"):
+    """Scores, features and (optionally) risk predictions from one stats pass"""
+    stats = aggregate_driver_stats(logs, by)
+    result = SafetyScoreCalculator().calculate_scores(stats=stats)
+    if predictor is not None:
+        result = result.join(predictor.features_from_stats(stats))
+        result = result.join(predictor.predict_many(stats=stats))
+    return result
+
+
+def score_fleet_parallel(logs, predictor=None, by="driver_id", n_workers=None):
+    """
+    Score, extract features and predict risk for every driver on all cores
+
+    Rows are grouped by driver into one contiguous shard per worker and
+    copied once into shared memory; workers read their slice in place and
+    only the small per-driver results are pickled back.
+
+    Args:
+        logs (pd.DataFrame): Driving logs for many drivers
+        predictor (RiskPredictor): Trained predictor (optional)
+        by (str): Column identifying the driver
+        n_workers (int): Worker processes (default: all cores)
+
+    Returns:
+        pd.DataFrame: One row per driver with score, category, color and,
+            with a predictor, the risk features and prediction
+    """
+    codes, drivers = pd.factorize(logs[by], sort=True)
+    # No worker without drivers to score; empty logs take the serial path
+    n_workers = min(n_workers or os.cpu_count() or 1, len(drivers))
+
+    if n_workers <= 1:
+        frame = logs.assign(driver=codes)
+        result = _score_frame(frame, predictor)
+        result.index = drivers[result.index]
+        result.index.name = by
+        return result
+
+    # Contiguous shard per worker, each driver entirely inside one shard
+    shards = codes % n_workers
+    order = np.argsort(shards, kind="stable")
+    bounds = np.searchsorted(shards[order], np.arange(n_workers + 1))
+
+    arrays = {
+        "driver": codes[order].astype(np.int64),
+        "speed_kmh": logs["speed_kmh"].to_numpy(dtype="float64")[order],
+        "speed_limit": logs["speed_limit"].to_numpy(dtype="float64")[order],
+        "harsh_braking": logs["harsh_braking"].to_numpy(dtype="int64")[order],
+        "phone_usage": logs["phone_usage"].to_numpy(dtype="int64")[order],
+        "violation": violation_mask(logs["violation_type"]).to_numpy(dtype="int8")[order],
+    }
+
+    blocks = []
+    try:
+        layout = {}
+        for column in SHARED_COLUMNS:
+            array = arrays.pop(column)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            blocks.append(block)
+            np.ndarray(len(array), dtype=array.dtype, buffer=block.buf)[:] = array
+            layout[column] = (block.name, array.dtype.str, len(array))
+
+        with ProcessPoolExecutor(n_workers, initializer=_init_worker, initargs=(predictor,)) as pool:
+            futures = [
+                pool.submit(_score_shard, layout, int(bounds[i]), int(bounds[i + 1]))
+                for i in range(n_workers) if bounds[i] < bounds[i + 1]
+            ]
+            result = pd.concat([future.result() for future in futures]).sort_index()
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    result.index = drivers[result.index]
+    result.index.name = by
+    return result
@@ -0,0 +1,198 @@
+"""
+Spatial Grid Index for Salmeen Platform
+Bins driving logs into hierarchical geohash-style cells to find risk hotspots
+"""
+
+import numpy as np
+import pandas as pd
+
+from model import violation_mask
+
+
+# Finest grid level: 16 bits per axis, roughly 300m x 550m cells in Riyadh
+MAX_LEVEL = 16
+
+STAT_COLUMNS = ["records", "speeding", "harsh_braking", "phone_usage", "violations"]
+
+
+def _spread_bits(values):
+    """Insert a zero bit between each of the low 32 bits"""
+    x = values.astype(np.uint64)
+    x = (x | (x << np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    x = (x | (x << np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+    x = (x | (x << np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    x = (x | (x << np.uint64(2))) & np.uint64(0x3333333333333333)
+    x = (x | (x << np.uint64(1))) & np.uint64(0x5555555555555555)
+    return x
+
+
+def _compact_bits(values):
+    """Inverse of _spread_bits: keep every other bit"""
+    x = values.astype(np.uint64) & np.uint64(0x5555555555555555)
+    x = (x | (x >> np.uint64(1))) & np.uint64(0x3333333333333333)
+    x = (x | (x >> np.uint64(2))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    x = (x | (x >> np.uint64(4))) & np.uint64(0x00FF00FF00FF00FF)
+    x = (x | (x >> np.uint64(8))) & np.uint64(0x0000FFFF0000FFFF)
+    x = (x | (x >> np.uint64(16))) & np.uint64(0x00000000FFFFFFFF)
+    return x
+
+
+def encode_cells(lat, lon, level=MAX_LEVEL):
+    """
+    Map coordinates to grid cell ids (interleaved lon/lat bits, as in geohash)
+
+    Args:
+        lat (array-like): Latitudes
+        lon (array-like): Longitudes
+        level (int): Bits per axis (1-MAX_LEVEL)
+
+    Returns:
+        np.ndarray: uint64 cell ids
+    """
+    size = 2 ** level
+    lat_idx = np.clip(((np.asarray(lat, dtype="float64") + 90) / 180 * size).astype(np.int64), 0, size - 1)
+    lon_idx = np.clip(((np.asarray(lon, dtype="float64") + 180) / 360 * size).astype(np.int64), 0, size - 1)
+    return (_spread_bits(lon_idx) << np.uint64(1)) | _spread_bits(lat_idx)
+
+
+def parent_cells(cells, level, parent_level):
+    """
+    Map cell ids to their enclosing cells at a coarser level
+
+    Args:
+        cells (np.ndarray): Cell ids at level
+        level (int): Level of the given cells
+        parent_level (int): Coarser target level
+
+    Returns:
+        np.ndarray: uint64 cell ids at parent_level
+    """
+    return np.asarray(cells, dtype=np.uint64) >> np.uint64(2 * (level - parent_level))
+
+
+def cell_bounds(cells, level):
+    """
+    Bounding boxes of grid cells
+
+    Args:
+        cells (np.ndarray): Cell ids
+        level (int): Level of the cells
+
+    Returns:
+        pd.DataFrame: lat_min, lat_max, lon_min, lon_max per cell
+    """
+    cells = np.asarray(cells, dtype=np.uint64)
+    size = 2 ** level
+    lat_idx = _compact_bits(cells).astype("float64")
+    lon_idx = _compact_bits(cells >> np.uint64(1)).astype("float64")
+    return pd.DataFrame({
+        "lat_min": lat_idx * 180 / size - 90,
+        "lat_max": (lat_idx + 1) * 180 / size - 90,
+        "lon_min": lon_idx * 360 / size - 180,
+        "lon_max": (lon_idx + 1) * 360 / size - 180,
+    })
+
+
+class GridIndex:
+    """Per-cell risk aggregates over driving logs at every grid level"""
+
+    def __init__(self):
+        self._cells = pd.DataFrame(columns=STAT_COLUMNS, dtype="int64")
+        self._levels = {}
+
+    def add(self, df):
+        """
+        Fold new driving logs into the finest-level cell aggregates
+
+        Args:
+            df (pd.DataFrame): Driving logs with location_lat/location_lon
+        """
+        cells = encode_cells(df["location_lat"], df["location_lon"])
+        stats = pd.DataFrame({
+            "records": 1,
+            "speeding": (df["speed_kmh"] > df["speed_limit"]).to_numpy(dtype="int64"),
+            "harsh_braking": df["harsh_braking"].to_numpy(dtype="int64"),
+            "phone_usage": df["phone_usage"].to_numpy(dtype="int64"),
+            "violations": violation_mask(df["violation_type"]).to_numpy(dtype="int64"),
+        }, index=pd.Index(cells, name="cell")).groupby(level="cell").sum()
+
+        self._cells = stats.add(self._cells, fill_value=0).astype("int64")
+        self._levels = {}
+
+    def cells(self, level=MAX_LEVEL):
+        """
+        Cell aggregates at a grid level, with centers and rates
+
+        Args:
+            level (int): Bits per axis (1-MAX_LEVEL)
+
+        Returns:
+            pd.DataFrame: One row per non-empty cell
+        """
+        if level not in self._levels:
+            parents = parent_cells(self._cells.index.to_numpy(), MAX_LEVEL, level)
+            stats = self._cells.groupby(pd.Index(parents, name="cell")).sum()
+
+            bounds = cell_bounds(stats.index.to_numpy(), level).set_index(stats.index)
+            stats["lat"] = (bounds["lat_min"] + bounds["lat_max"]) / 2
+            stats["lon"] = (bounds["lon_min"] + bounds["lon_max"]) / 2
+            records = stats["records"]
+            stats["speeding_rate"] = stats["speeding"] / records
+            stats["harsh_braking_rate"] = stats["harsh_braking"] / records
+            stats["violation_rate"] = stats["violations"] / records
+            stats["risk_index"] = stats[STAT_COLUMNS[1:]].sum(axis=1) / records
+            self._levels[level] = stats
+
+        return self._levels[level]
+
+    def top_cells(self, n=10, level=13, min_records=5):
+        """
+        Riskiest cells by risk index
+
+        Args:
+            n (int): Number of cells to return
+            level (int): Grid level
+            min_records (int): Ignore cells with fewer records
+
+        Returns:
+            pd.DataFrame: Top-N cells, riskiest first
+        """
+        cells = self.cells(level)
+        return cells[cells["records"] >= min_records].nlargest(n, "risk_index")
+
+    def query_bbox(self, lat_min, lat_max, lon_min, lon_max, level=MAX_LEVEL):
+        """
+        Cells whose center falls inside a bounding box
+
+        Args:
+            lat_min (float): Southern edge
+            lat_max (float): Northern edge
+            lon_min (float): Western edge
+            lon_max (float): Eastern edge
+            level (int): Grid level
+
+        Returns:
+            pd.DataFrame: Matching cells
+        """
+        cells = self.cells(level)
+        inside = cells["lat"].between(lat_min, lat_max) & cells["lon"].between(lon_min, lon_max)
+        return cells[inside]
+
+    def risk_zones(self, level=13, min_records=5, factor=1.25):
+        """
+        Cells whose risk index is well above the city-wide level
+
+        Args:
+            level (int): Grid level
+            min_records (int): Ignore cells with fewer records
+            factor (float): Multiple of the city-wide risk index to exceed
+
+        Returns:
+            pd.DataFrame: High-risk cells, riskiest first
+        """
+        cells = self.cells(level)
+        if cells.empty:
+            return cells
+        city_index = cells[STAT_COLUMNS[1:]].to_numpy().sum() / cells["records"].sum()
+        zones = cells[(cells["records"] >= min_records) & (cells["risk_index"] >= factor * city_index)]
+        return zones.sort_values("risk_index", ascending=False)
@@ -0,0 +1,342 @@
+"""
+Embedded SQL Log Database for Salmeen Platform
+SQLite store of driving logs with indexes on date, location and violation
+type, and the filtered queries behind the ministry dashboard
+"""
+
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+from utils import NO_VIOLATION, RIYADH_LOCATIONS, VIOLATION_TYPES
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS locations (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS violation_types (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS logs (
+    date TEXT NOT NULL,
+    hour INTEGER,
+    timestamp TEXT,
+    driver_id INTEGER,
+    trip_id INTEGER,
+    speed_kmh REAL,
+    speed_limit INTEGER,
+    harsh_braking INTEGER,
+    phone_usage INTEGER,
+    location_lat REAL,
+    location_lon REAL,
+    location_id INTEGER REFERENCES locations (id),
+    violation_id INTEGER REFERENCES violation_types (id),
+    driver_profile TEXT
+);
+CREATE INDEX IF NOT EXISTS logs_date ON logs (date);
+CREATE INDEX IF NOT EXISTS logs_location_date ON logs (location_id, date);
+CREATE INDEX IF NOT EXISTS logs_violation_date ON logs (violation_id, date);
+CREATE VIEW IF NOT EXISTS driving_logs AS
+    SELECT logs.date, logs.hour, logs.timestamp, logs.driver_id, logs.trip_id,
+           logs.speed_kmh, logs.speed_limit, logs.harsh_braking, logs.phone_usage,
+           logs.location_lat, logs.location_lon, locations.name AS location_name,
+           violation_types.name AS violation_type, logs.driver_profile
+    FROM logs
+    JOIN locations ON locations.id = logs.location_id
+    JOIN violation_types ON violation_types.id = logs.violation_id;
+"""
+
+# Stored columns, in insert order
+LOG_COLUMNS = [
+    "date", "hour", "timestamp", "driver_id", "trip_id", "speed_kmh", "speed_limit",
+    "harsh_braking", "phone_usage", "location_lat", "location_lon", "location_id",
+    "violation_id", "driver_profile",
+]
+
+# Dimensions a count can be grouped by: name -> (stored column, dimension table)
+GROUP_COLUMNS = {
+    "date": ("date", None),
+    "hour": ("hour", None),
+    "location_name": ("location_id", "locations"),
+    "violation_type": ("violation_id", "violation_types"),
+}
+
+
+class LogDatabase:
+    """SQLite driving-log database with indexed date, location and violation filters"""
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): SQLite database file (created on first use)
+        """
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connection() as connection:
+            connection.executescript(SCHEMA)
+            # Known names keep fixed ids, like utils.to_compact's category
+            # codes ("لا يوجد" is always 0)
+            connection.executemany(
+                "INSERT OR IGNORE INTO locations (id, name) VALUES (?, ?)",
+                enumerate(loc["name"] for loc in RIYADH_LOCATIONS),
+            )
+            connection.executemany(
+                "INSERT OR IGNORE INTO violation_types (id, name) VALUES (?, ?)",
+                enumerate(VIOLATION_TYPES),
+            )
+
+    def _connection(self):
+        """One connection per thread (sqlite3 connections are not shared)"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def append(self, df):
+        """
+        Insert driving logs
+
+        Args:
+            df (pd.DataFrame): Driving logs in the driving_data.csv schema
+                (timestamp, driver_id and trip_id are optional)
+        """
+        if len(df) == 0:
+            return
+        with self._connection() as connection:
+            location_ids = self._dimension_ids(connection, "locations", df["location_name"])
+            violation_ids = self._dimension_ids(connection, "violation_types", df["violation_type"])
+
+            dates = pd.to_datetime(df["date"])
+            if "timestamp" in df.columns:
+                timestamps = pd.to_datetime(df["timestamp"])
+                hours = timestamps.dt.hour
+                timestamps = timestamps.dt.strftime("%Y-%m-%d %H:%M:%S")
+            else:
+                hours = timestamps = None
+
+            columns = {
+                "date": dates.dt.strftime("%Y-%m-%d"),
+                "hour": hours,
+                "timestamp": timestamps,
+                "driver_id": df.get("driver_id"),
+                "trip_id": df.get("trip_id"),
+                "speed_kmh": df["speed_kmh"].astype("float64"),
+                "speed_limit": df["speed_limit"].astype("int64"),
+                "harsh_braking": df["harsh_braking"].astype("int64"),
+                "phone_usage": df["phone_usage"].astype("int64"),
+                "location_lat": df["location_lat"].astype("float64"),
+                "location_lon": df["location_lon"].astype("float64"),
+                "location_id": location_ids,
+                "violation_id": violation_ids,
+                "driver_profile": df.get("driver_profile"),
+            }
+            # Column-wise conversion to Python values is far cheaper than
+            # iterating DataFrame rows; missing columns are stored as NULL
+            values = [
+                [None] * len(df) if column is None else column.astype(object).where(column.notna(), None).tolist()
+                for column in (columns[name] for name in LOG_COLUMNS)
+            ]
+
+            placeholders = ", ".join("?" * len(LOG_COLUMNS))
+            connection.executemany(
+                f"INSERT INTO logs ({', '.join(LOG_COLUMNS)}) VALUES ({placeholders})",
+                zip(*values),
+            )
+
+    def _dimension_ids(self, connection, table, names):
+        """Map names to dimension ids, registering unseen names"""
+        names = names.astype(object)
+        ids = dict(connection.execute(f"SELECT name, id FROM {table}").fetchall())
+        unseen = sorted(set(names.dropna().unique()) - set(ids))
+        if unseen:
+            next_id = max(ids.values(), default=-1) + 1
+            connection.executemany(
+                f"INSERT INTO {table} (id, name) VALUES (?, ?)",
+                enumerate(unseen, start=next_id),
+            )
+            ids.update((name, i) for i, name in enumerate(unseen, start=next_id))
+        return names.map(ids)
+
+    def close(self):
+        """Close the calling thread's connection"""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    @classmethod
+    def from_csv(cls, csv_path, path, chunksize=1_000_000):
+        """
+        Open a database, building it from a CSV file if it does not exist yet
+
+        The logs are imported into a temporary file that is then linked into
+        place, so an interrupted import never leaves a partial database and
+        processes starting together never import twice.
+
+        Args:
+            csv_path (str): Source CSV file
+            path (str): SQLite database file
+            chunksize (int): Records inserted per chunk
+
+        Returns:
+            LogDatabase: Database holding the logs
+        """
+        if not os.path.exists(path):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            try:
+                cls.import_csv(csv_path, tmp_path, chunksize).close()
+                # Unlike a rename, linking fails if another process got there first
+                os.link(tmp_path, path)
+            except FileExistsError:
+                pass
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        return cls(path)
+
+    @classmethod
+    def import_csv(cls, csv_path, path, chunksize=1_000_000):
+        """
+        Load a driving_data.csv style file into a LogDatabase
+
+        Args:
+            csv_path (str): Source CSV file
+            path (str): SQLite database file
+            chunksize (int): Records inserted per chunk
+
+        Returns:
+            LogDatabase: Database holding the imported logs
+        """
+        database = cls(path)
+        for chunk in pd.read_csv(csv_path, encoding="utf-8-sig", chunksize=chunksize):
+            database.append(chunk)
+        return database
+
+    def query(self, sql, params=()):
+        """
+        Run an ad hoc SQL query (the driving_logs view has readable names)
+
+        Args:
+            sql (str): SQL statement
+            params (tuple or dict): Query parameters
+
+        Returns:
+            pd.DataFrame: Query result
+        """
+        return pd.read_sql_query(sql, self._connection(), params=params)
+
+    def count(self):
+        """
+        Returns:
+            int: Number of stored records
+        """
+        return self._connection().execute("SELECT COUNT(*) FROM logs").fetchone()[0]
+
+    def date_range(self):
+        """
+        Returns:
+            tuple: First and last stored dates (YYYY-MM-DD), or (None, None)
+        """
+        return self._connection().execute("SELECT MIN(date), MAX(date) FROM logs").fetchone()
+
+    def violation_counts(self, start_date=None, end_date=None, location=None, violation_type=None,
+                         by=("location_name",), include_clean=False):
+        """
+        Count records matching the filters, grouped by dimensions
+
+        Args:
+            start_date (str): First date to include (YYYY-MM-DD)
+            end_date (str): Last date to include (YYYY-MM-DD)
+            location (str): Only this location
+            violation_type (str): Only this violation type
+            by (tuple): Any of "date", "hour", "location_name", "violation_type"
+            include_clean (bool): Also count records without a violation
+
+        Returns:
+            pd.DataFrame: records per group, largest first (by date/hour for
+                time groupings)
+        """
+        by = list(by)
+        unknown = [column for column in by if column not in GROUP_COLUMNS]
+        if unknown:
+            raise ValueError(f"Cannot group by {unknown}; choose from {list(GROUP_COLUMNS)}")
+
+        where, params = self._where(start_date, end_date, location, violation_type)
+        if not include_clean and violation_type is None:
+            where.append("violation_id <> ?")
+            params.append(self._id("violation_types", NO_VIOLATION))
+
+        inner = [GROUP_COLUMNS[column][0] for column in by]
+        outer, joins = [], []
+        for column in by:
+            stored, table = GROUP_COLUMNS[column]
+            if table is None:
+                outer.append(f"g.{stored} AS {column}")
+            else:
+                outer.append(f"{table}.name AS {column}")
+                joins.append(f"JOIN {table} ON {table}.id = g.{stored}")
+
+        group = f"GROUP BY {', '.join(inner)}" if inner else ""
+        time_order = [column for column in by if column in ("date", "hour")]
+        order = f"ORDER BY {', '.join(time_order)}" if time_order else "ORDER BY records DESC"
+        sql = (
+            f"SELECT {', '.join(outer + ['g.records'])} FROM ("
+            f"SELECT {', '.join(inner + ['COUNT(*) AS records'])} FROM logs"
+            f"{self._where_sql(where)} {group}) g {' '.join(joins)} {order}"
+        )
+        result = self.query(sql, params)
+        return result.set_index(by) if by else result
+
+    def phone_usage_by_hour(self, start_date=None, end_date=None, location=None):
+        """
+        Share of records with phone usage per hour of day
+
+        Args:
+            start_date (str): First date to include (YYYY-MM-DD)
+            end_date (str): Last date to include (YYYY-MM-DD)
+            location (str): Only this location
+
+        Returns:
+            pd.DataFrame: records and phone_usage_rate per hour
+        """
+        where, params = self._where(start_date, end_date, location, None)
+        where.append("hour IS NOT NULL")
+        return self.query(
+            "SELECT hour, COUNT(*) AS records, AVG(phone_usage) AS phone_usage_rate FROM logs"
+            f"{self._where_sql(where)} GROUP BY hour ORDER BY hour",
+            params,
+        ).set_index("hour")
+
+    def _id(self, table, name):
+        row = self._connection().execute(f"SELECT id FROM {table} WHERE name = ?", (name,)).fetchone()
+        # Unknown names match no rows
+        return -1 if row is None else row[0]
+
+    def _where(self, start_date, end_date, location, violation_type):
+        """Filter clauses on the indexed columns"""
+        where, params = [], []
+        if location is not None:
+            where.append("location_id = ?")
+            params.append(self._id("locations", location))
+        if violation_type is not None:
+            where.append("violation_id = ?")
+            params.append(self._id("violation_types", violation_type))
+        if start_date is not None:
+            where.append("date >= ?")
+            params.append(pd.Timestamp(start_date).strftime("%Y-%m-%d"))
+        if end_date is not None:
+            where.append("date <= ?")
+            params.append(pd.Timestamp(end_date).strftime("%Y-%m-%d"))
+        return where, params
+
+    @staticmethod
+    def _where_sql(where):
+        return f" WHERE {' AND '.join(where)}" if where else ""
@@ -0,0 +1,186 @@
+"""
+Columnar Log Storage for Salmeen Platform
+Stores driving logs as date-partitioned Parquet/Arrow files
+"""
+
+import os
+import uuid
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+
+# File extension per supported storage format
+FORMATS = {"parquet": "parquet", "feather": "arrow"}
+
+
+class LogStore:
+    """Date-partitioned columnar store for driving logs"""
+
+    def __init__(self, root, format=None):
+        """
+        Args:
+            root (str): Store directory (created on first write)
+            format (str): "parquet" (compressed) or "feather" (uncompressed
+                Arrow IPC, best for memory-mapped loads). By default an
+                existing store keeps its format and a new one uses Parquet.
+        """
+        if pa is None:
+            raise ImportError("LogStore requires pyarrow: pip install pyarrow")
+        stored = _detect_format(root)
+        if format is None:
+            format = stored or "parquet"
+        if format not in FORMATS:
+            raise ValueError(f"Unsupported format: {format}")
+        if stored is not None and stored != format:
+            raise ValueError(f"{root} holds {stored} files, not {format}")
+
+        self.root = root
+        self.format = format
+        self.partitioning = ds.partitioning(pa.schema([("date", pa.date32())]), flavor="hive")
+
+    def append(self, df):
+        """
+        Append driving logs, one partition directory per date
+
+        Args:
+            df (pd.DataFrame): Driving logs with a date column
+        """
+        dates = pd.to_datetime(df["date"]).to_numpy().astype("datetime64[D]")
+        table = pa.Table.from_pandas(df.drop(columns=["date"]), preserve_index=False)
+        table = table.append_column("date", pa.array(dates, type=pa.date32()))
+
+        ds.write_dataset(
+            table,
+            self.root,
+            format=self._file_format(),
+            partitioning=self.partitioning,
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.{FORMATS[self.format]}",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+
+    def read(self, columns=None, start_date=None, end_date=None, memory_map=True):
+        """
+        Load driving logs, touching only the requested columns and dates
+
+        Args:
+            columns (list): Columns to load (default: all)
+            start_date (str): First date to include (YYYY-MM-DD)
+            end_date (str): Last date to include (YYYY-MM-DD)
+            memory_map (bool): Memory-map files instead of reading them
+
+        Returns:
+            pd.DataFrame: Driving logs with typed columns
+        """
+        table = self._dataset(memory_map).to_table(
+            columns=columns, filter=self._date_filter(start_date, end_date)
+        )
+        return _to_frame(table)
+
+    def iter_batches(self, columns=None, batch_size=1_000_000, start_date=None,
+                     end_date=None, memory_map=True):
+        """
+        Stream driving logs as bounded-size DataFrames
+
+        Args:
+            columns (list): Columns to load (default: all)
+            batch_size (int): Maximum number of records per batch
+            start_date (str): First date to include (YYYY-MM-DD)
+            end_date (str): Last date to include (YYYY-MM-DD)
+            memory_map (bool): Memory-map files instead of reading them
+
+        Yields:
+            pd.DataFrame: Batch of driving logs
+        """
+        scanner = self._dataset(memory_map).scanner(
+            columns=columns,
+            filter=self._date_filter(start_date, end_date),
+            batch_size=batch_size,
+        )
+        for batch in scanner.to_batches():
+            if batch.num_rows:
+                yield _to_frame(batch)
+
+    def dates(self):
+        """
+        List the dates stored so far
+
+        Returns:
+            list: Sorted partition dates (YYYY-MM-DD)
+        """
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name.split("=", 1)[1] for name in os.listdir(self.root) if name.startswith("date=")
+        )
+
+    @classmethod
+    def import_csv(cls, csv_path, root, format=None, chunksize=1_000_000):
+        """
+        Convert a driving_data.csv style file into a LogStore
+
+        Args:
+            csv_path (str): Source CSV file
+            root (str): Store directory
+            format (str): Storage format (see LogStore)
+            chunksize (int): Records converted per chunk
+
+        Returns:
+            LogStore: Store holding the imported logs
+        """
+        store = cls(root, format)
+        for chunk in pd.read_csv(csv_path, encoding="utf-8-sig", chunksize=chunksize):
+            store.append(chunk)
+        return store
+
+    def _file_format(self):
+        if self.format == "feather":
+            return ds.IpcFileFormat()
+        return ds.ParquetFileFormat()
+
+    def _dataset(self, memory_map):
+        return ds.dataset(
+            self.root,
+            format=self._file_format(),
+            partitioning=self.partitioning,
+            filesystem=fs.LocalFileSystem(use_mmap=memory_map),
+        )
+
+    def _date_filter(self, start_date, end_date):
+        condition = None
+        if start_date is not None:
+            condition = ds.field("date") >= pa.scalar(pd.Timestamp(start_date).date(), pa.date32())
+        if end_date is not None:
+            upper = ds.field("date") <= pa.scalar(pd.Timestamp(end_date).date(), pa.date32())
+            condition = upper if condition is None else condition & upper
+        return condition
+
+
+def _detect_format(root):
+    """Storage format of the files already in a store, or None if it is empty"""
+    extensions = {extension: name for name, extension in FORMATS.items()}
+    for _, _, files in os.walk(root):
+        for file in files:
+            name = extensions.get(file.rsplit(".", 1)[-1])
+            if name is not None:
+                return name
+    return None
+
+
+def _to_frame(table):
+    """Convert an Arrow table or batch to pandas with date as the first column"""
+    df = table.to_pandas(date_as_object=False)
+    if "date" in df.columns:
+        df = df[["date"] + [column for column in df.columns if column != "date"]]
+    return df
+
+
+if __name__ == "__main__":
+    # Convert the default CSV into a Parquet store when run directly
+    store = LogStore.import_csv("driving_data.csv", "driving_logs")
+    print(f"✅ Imported {len(store.dates())} days of logs into {store.root}")
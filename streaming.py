@@ -0,0 +1,83 @@
+"""
+Out-of-Core Scoring for Salmeen Platform
+Scores driving logs larger than memory from bounded-size chunks
+"""
+
+import os
+
+import pandas as pd
+
+from model import SafetyScoreCalculator, aggregate_driver_stats, merge_driver_stats
+
+
+def iter_log_chunks(source, chunksize=1_000_000, columns=None):
+    """
+    Read driving logs as bounded-size DataFrames
+
+    Args:
+        source (str): CSV file or LogStore directory
+        chunksize (int): Maximum records per chunk
+        columns (list): Columns to read (default: all)
+
+    Yields:
+        pd.DataFrame: Chunk of driving logs
+    """
+    if os.path.isdir(source):
+        from storage import LogStore
+        yield from LogStore(source).iter_batches(columns=columns, batch_size=chunksize)
+    else:
+        yield from pd.read_csv(source, encoding="utf-8-sig", usecols=columns, chunksize=chunksize)
+
+
+def stream_driver_stats(chunks, by="driver_id"):
+    """
+    Fold log chunks into per-driver statistics
+
+    Memory is bounded by one chunk plus one row per driver, whatever the
+    total number of records.
+
+    Args:
+        chunks (iterable): DataFrames of driving logs
+        by (str): Column identifying the driver
+
+    Returns:
+        pd.DataFrame: Per-driver statistics, as aggregate_driver_stats over all chunks
+    """
+    stats = None
+    for chunk in chunks:
+        if len(chunk) == 0:
+            continue
+        partial = aggregate_driver_stats(chunk, by)
+        stats = partial if stats is None else merge_driver_stats(stats, partial)
+    return stats
+
+
+def stream_scores(source, predictor=None, by="driver_id", chunksize=1_000_000):
+    """
+    Safety scores and risk features for every driver in a log source too
+    large to load at once
+
+    Args:
+        source (str or iterable): CSV file, LogStore directory or an
+            iterable of log chunks
+        predictor (RiskPredictor): Provides features (and predictions
+            when trained); optional
+        by (str): Column identifying the driver
+        chunksize (int): Maximum records per chunk
+
+    Returns:
+        pd.DataFrame: One row per driver with score, category, color and,
+            with a predictor, the risk features and prediction
+    """
+    columns = [by, "speed_kmh", "speed_limit", "harsh_braking", "phone_usage", "violation_type"]
+    chunks = iter_log_chunks(source, chunksize, columns) if isinstance(source, str) else source
+
+    stats = stream_driver_stats(chunks, by)
+    if stats is None:
+        return pd.DataFrame(columns=["score", "category", "color"])
+
+    result = SafetyScoreCalculator().calculate_scores(stats=stats)
+    if predictor is not None:
+        result = result.join(predictor.features_from_stats(stats))
+        result = result.join(predictor.predict_many(stats=stats))
+    return result
@@ -6,16 +6,99 @@ Generates realistic dummy data for Saudi traffic contexts
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+import os
 import random
 
 
-def generate_dummy_data(num_records=500):
+# Famous Riyadh locations and roads
+RIYADH_LOCATIONS = [
+    {"name": "طريق الملك فهد", "lat": 24.7136, "lon": 46.6753},
+    {"name": "طريق الملك عبدالله", "lat": 24.7500, "lon": 46.7200},
+    {"name": "طريق الملك خالد", "lat": 24.6900, "lon": 46.6900},
+    {"name": "شارع العليا", "lat": 24.7100, "lon": 46.6800},
+    {"name": "طريق الدائري الشرقي", "lat": 24.7400, "lon": 46.7500},
+    {"name": "حي النخيل", "lat": 24.7700, "lon": 46.7300},
+    {"name": "حي الملقا", "lat": 24.7800, "lon": 46.6400},
+    {"name": "حي الياسمين", "lat": 24.8100, "lon": 46.6600},
+    {"name": "طريق خريص", "lat": 24.6500, "lon": 46.7100},
+    {"name": "حي الربوة", "lat": 24.7300, "lon": 46.6500},
+]
+
+# Violation types in Arabic
+VIOLATION_TYPES = [
+    "لا يوجد",
+    "تجاوز السرعة",
+    "قطع الإشارة الحمراء",
+    "عدم ربط حزام الأمان",
+    "استخدام الجوال أثناء القيادة",
+    "تجاوز خاطئ",
+    "عدم إعطاء الأولوية",
+]
+
+NO_VIOLATION = VIOLATION_TYPES[0]
+
+DRIVER_PROFILES = ["safe", "risky"]
+
+# Behaviour parameters per driver profile
+PROFILE_PARAMS = {
+    "safe": {"speed_mean": 100, "speed_std": 15, "speed_min": 60, "speed_max": 140,
+             "harsh_braking": 0.05, "phone_usage": 0.03, "clean": 0.9},
+    "risky": {"speed_mean": 130, "speed_std": 20, "speed_min": 100, "speed_max": 180,
+              "harsh_braking": 0.25, "phone_usage": 0.20, "clean": 0.6},
+}
+
+# Compact in-memory dtypes for driving logs (see to_compact)
+COMPACT_DTYPES = {
+    "driver_id": "int32",
+    "trip_id": "int64",
+    "speed_kmh": "float32",
+    "speed_limit": "int16",
+    "harsh_braking": "int8",
+    "phone_usage": "int8",
+    "location_lat": "float32",
+    "location_lon": "float32",
+    "location_name": "category",
+    "violation_type": "category",
+    "driver_profile": "category",
+}
+
+COLUMNS = [
+    "date", "timestamp", "driver_id", "trip_id", "speed_kmh", "speed_limit", "harsh_braking", "phone_usage",
+    "location_lat", "location_lon", "location_name", "violation_type", "driver_profile",
+]
+
+# Average records per generated driver (RiskPredictor used to cut 20-record chunks)
+RECORDS_PER_DRIVER = 20
+
+# Silence between two events of a driver that starts a new trip
+TRIP_GAP_MINUTES = 30
+
+# Average events per generated trip, and the pause between them (minutes)
+EVENTS_PER_TRIP = 8
+EVENT_INTERVAL_MINUTES = (1, 5)
+
+
+def generate_dummy_data(num_records=500, vectorized=False, num_drivers=None):
     """
     Generate realistic dummy driving data for Saudi Arabia (Riyadh context)
     
+    Args:
+        num_records (int): Number of driving records
+        vectorized (bool): Draw all columns as NumPy arrays instead of
+            row by row. Same distributions and schema, but a different
+            random stream, so rows differ from the default mode.
+        num_drivers (int): Number of distinct drivers (default: one per
+            RECORDS_PER_DRIVER records). Each driver keeps one profile,
+            except that a single driver gets the records of both.
+    
     Returns:
         pd.DataFrame: DataFrame with driving logs
     """
+    if num_drivers is None:
+        num_drivers = max(1, num_records // RECORDS_PER_DRIVER)
+    if vectorized:
+        return sessionize(_generate_vectorized(num_records, np.random.default_rng(42), num_drivers))
+    
     np.random.seed(42)
     random.seed(42)
     
@@ -23,31 +106,6 @@ def generate_dummy_data(num_records=500):
     riyadh_center_lat = 24.7136
     riyadh_center_lon = 46.6753
     
-    # Famous Riyadh locations and roads
-    riyadh_locations = [
-        {"name": "طريق الملك فهد", "lat": 24.7136, "lon": 46.6753},
-        {"name": "طريق الملك عبدالله", "lat": 24.7500, "lon": 46.7200},
-        {"name": "طريق الملك خالد", "lat": 24.6900, "lon": 46.6900},
-        {"name": "شارع العليا", "lat": 24.7100, "lon": 46.6800},
-        {"name": "طريق الدائري الشرقي", "lat": 24.7400, "lon": 46.7500},
-        {"name": "حي النخيل", "lat": 24.7700, "lon": 46.7300},
-        {"name": "حي الملقا", "lat": 24.7800, "lon": 46.6400},
-        {"name": "حي الياسمين", "lat": 24.8100, "lon": 46.6600},
-        {"name": "طريق خريص", "lat": 24.6500, "lon": 46.7100},
-        {"name": "حي الربوة", "lat": 24.7300, "lon": 46.6500},
-    ]
-    
-    # Violation types in Arabic
-    violation_types = [
-        "لا يوجد",
-        "تجاوز السرعة",
-        "قطع الإشارة الحمراء",
-        "عدم ربط حزام الأمان",
-        "استخدام الجوال أثناء القيادة",
-        "تجاوز خاطئ",
-        "عدم إعطاء الأولوية",
-    ]
-    
     # Generate data
     data = []
     start_date = datetime.now() - timedelta(days=90)
@@ -71,7 +129,7 @@ def generate_dummy_data(num_records=500):
         record_date = start_date + timedelta(days=days_ago)
         
         # Select random location
-        location = random.choice(riyadh_locations)
+        location = random.choice(RIYADH_LOCATIONS)
         lat = location["lat"] + np.random.normal(0, 0.02)
         lon = location["lon"] + np.random.normal(0, 0.02)
         location_name = location["name"]
@@ -82,14 +140,14 @@ def generate_dummy_data(num_records=500):
             speed_kmh = max(60, min(140, speed_kmh))  # Clamp between 60-140
             harsh_braking = 1 if random.random() < 0.05 else 0  # 5% chance
             phone_usage = 1 if random.random() < 0.03 else 0  # 3% chance
-            violation = "لا يوجد" if random.random() < 0.9 else random.choice(violation_types[1:])
+            violation = "لا يوجد" if random.random() < 0.9 else random.choice(VIOLATION_TYPES[1:])
         else:
             # Risky driver characteristics
             speed_kmh = np.random.normal(130, 20)  # Higher average speed
             speed_kmh = max(100, min(180, speed_kmh))  # Clamp between 100-180
             harsh_braking = 1 if random.random() < 0.25 else 0  # 25% chance
             phone_usage = 1 if random.random() < 0.20 else 0  # 20% chance
-            violation = "لا يوجد" if random.random() < 0.6 else random.choice(violation_types[1:])
+            violation = "لا يوجد" if random.random() < 0.6 else random.choice(VIOLATION_TYPES[1:])
         
         # Speed limit (most roads in Riyadh: 120 km/h)
         speed_limit = 120
@@ -108,11 +166,286 @@ def generate_dummy_data(num_records=500):
         })
     
     df = pd.DataFrame(data)
-    df = df.sort_values("date").reset_index(drop=True)
+    
+    # Identities and trip times come from their own stream, so the other
+    # columns are the same as before they existed; dates follow the trips
+    rng = np.random.default_rng(42)
+    is_risky = df["driver_profile"].to_numpy() == "risky"
+    driver_ids = _draw_driver_ids(is_risky, num_drivers, rng)
+    timestamps, day_index = _draw_trip_times(driver_ids, np.datetime64(start_date.date()), 91, rng)
+    df["date"] = _date_labels(start_date.date(), day_index)
+    df.insert(1, "timestamp", timestamps)
+    df.insert(2, "driver_id", driver_ids)
+    
+    df = df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+    
+    return sessionize(df)
+
+
+def _draw_driver_ids(is_risky, num_drivers, rng):
+    """
+    Assign records to drivers so that every driver has a single profile
+    
+    Args:
+        is_risky (np.ndarray): True for records of the risky profile
+        num_drivers (int): Number of drivers; 30% of them are risky. A
+            single driver gets every record, whatever its profile.
+        rng (np.random.Generator): Random generator to draw from
+        
+    Returns:
+        np.ndarray: Driver id per record (safe drivers first)
+    """
+    if num_drivers <= 1:
+        return np.zeros(len(is_risky), dtype=np.int64)
+    num_risky = min(max(1, round(num_drivers * 0.3)), max(1, num_drivers - 1))
+    num_safe = max(1, num_drivers - num_risky)
+    return np.where(
+        is_risky,
+        num_safe + rng.integers(0, num_risky, len(is_risky)),
+        rng.integers(0, num_safe, len(is_risky)),
+    )
+
+
+def _draw_trip_times(driver_ids, start_day, num_days, rng):
+    """
+    Group each driver's records into trips and time them
+    
+    Trips hold EVENTS_PER_TRIP events on average and start on a random day
+    between 05:00 and 21:59; events within a trip follow each other every
+    EVENT_INTERVAL_MINUTES, so sessionize recovers the trips.
+    
+    Args:
+        driver_ids (np.ndarray): Driver id per record
+        start_day (np.datetime64): First day of the period
+        num_days (int): Number of days trips can start on
+        rng (np.random.Generator): Random generator to draw from
+        
+    Returns:
+        tuple: Event times as datetime64[s] and the event's day index
+            from start_day, both in record order
+    """
+    n = len(driver_ids)
+    order = np.argsort(driver_ids, kind="stable")
+    sorted_drivers = driver_ids[order]
+    
+    # A trip starts at each driver change and, on average, every EVENTS_PER_TRIP events
+    new_trip = rng.random(n) < 1 / EVENTS_PER_TRIP
+    if n:
+        new_trip[0] = True
+        new_trip[1:] |= sorted_drivers[1:] != sorted_drivers[:-1]
+    trip = np.cumsum(new_trip) - 1
+    num_trips = int(trip[-1]) + 1 if n else 0
+    
+    trip_start = (rng.integers(0, num_days, num_trips) * 86400
+                  + rng.integers(5 * 3600, 22 * 3600, num_trips))
+    low, high = EVENT_INTERVAL_MINUTES
+    gaps = np.where(new_trip, 0, rng.integers(low * 60, high * 60 + 1, n))
+    elapsed = np.cumsum(gaps)
+    # Seconds since the trip's first event
+    elapsed -= elapsed[np.flatnonzero(new_trip)][trip]
+    
+    seconds = np.empty(n, dtype=np.int64)
+    seconds[order] = trip_start[trip] + elapsed
+    times = start_day.astype("datetime64[s]") + seconds.astype("timedelta64[s]")
+    return times, seconds // 86400
+
+
+def _date_labels(start_day, day_index):
+    """YYYY-MM-DD label for each day offset from start_day"""
+    if len(day_index) == 0:
+        return np.array([], dtype=object)
+    labels = np.array(
+        [(start_day + timedelta(days=d)).strftime("%Y-%m-%d") for d in range(int(day_index.max()) + 1)],
+        dtype=object,
+    )
+    return labels[day_index]
+
+
+def sessionize(df, gap_minutes=TRIP_GAP_MINUTES, by="driver_id", time_column="timestamp"):
+    """
+    Split each driver's time-ordered events into trips
+    
+    Events are sorted once by (driver, time); a trip starts at each driver
+    change or wherever consecutive events are more than gap_minutes apart.
+    
+    Args:
+        df (pd.DataFrame): Driving logs with driver and time columns
+        gap_minutes (float): Longest pause inside one trip
+        by (str): Column identifying the driver
+        time_column (str): Event time column
+        
+    Returns:
+        pd.DataFrame: Logs with a trip_id column (unique across drivers)
+    """
+    drivers = pd.factorize(df[by])[0]
+    times = pd.to_datetime(df[time_column]).to_numpy().astype("datetime64[ns]").astype(np.int64)
+    order = np.lexsort((times, drivers))
+    
+    new_trip = np.ones(len(df), dtype=bool)
+    if len(df) > 1:
+        sorted_drivers = drivers[order]
+        gap = np.diff(times[order]) > gap_minutes * 60 * 10 ** 9
+        new_trip[1:] = (sorted_drivers[1:] != sorted_drivers[:-1]) | gap
+    
+    trip_id = np.empty(len(df), dtype=np.int64)
+    trip_id[order] = np.cumsum(new_trip) - 1
+    
+    df = df.copy()
+    if "trip_id" in df.columns:
+        df["trip_id"] = trip_id
+    else:
+        df.insert(df.columns.get_loc(by) + 1, "trip_id", trip_id)
+    return df
+
+
+def _generate_vectorized(num_records, rng, num_drivers):
+    """
+    Draw a block of dummy driving records as whole NumPy arrays
+    
+    Args:
+        num_records (int): Number of driving records
+        rng (np.random.Generator): Random generator to draw from
+        num_drivers (int): Number of distinct drivers
+        
+    Returns:
+        pd.DataFrame: DataFrame with driving logs sorted by date (trip_id
+            still unset)
+    """
+    start_date = (datetime.now() - timedelta(days=90)).date()
+    
+    # 70% safe drivers, 30% risky drivers
+    is_risky = np.arange(num_records) >= int(np.ceil(num_records * 0.7))
+    rng.shuffle(is_risky)
+    params = {
+        key: np.where(is_risky, PROFILE_PARAMS["risky"][key], PROFILE_PARAMS["safe"][key])
+        for key in PROFILE_PARAMS["safe"]
+    }
+    
+    driver_ids = _draw_driver_ids(is_risky, num_drivers, rng)
+    timestamps, day_index = _draw_trip_times(driver_ids, np.datetime64(start_date), 91, rng)
+    
+    location_idx = rng.integers(0, len(RIYADH_LOCATIONS), num_records)
+    location_lat = np.array([loc["lat"] for loc in RIYADH_LOCATIONS])[location_idx]
+    location_lon = np.array([loc["lon"] for loc in RIYADH_LOCATIONS])[location_idx]
+    location_names = np.array([loc["name"] for loc in RIYADH_LOCATIONS], dtype=object)
+    
+    speed_kmh = rng.normal(params["speed_mean"], params["speed_std"])
+    speed_kmh = np.clip(speed_kmh, params["speed_min"], params["speed_max"])
+    
+    violation_idx = np.where(
+        rng.random(num_records) < params["clean"],
+        0,
+        rng.integers(1, len(VIOLATION_TYPES), num_records),
+    )
+    
+    df = pd.DataFrame({
+        "date": _date_labels(start_date, day_index),
+        "timestamp": timestamps,
+        "driver_id": driver_ids,
+        "trip_id": -1,
+        "speed_kmh": np.round(speed_kmh, 1),
+        "speed_limit": 120,
+        "harsh_braking": (rng.random(num_records) < params["harsh_braking"]).astype(int),
+        "phone_usage": (rng.random(num_records) < params["phone_usage"]).astype(int),
+        "location_lat": np.round(location_lat + rng.normal(0, 0.02, num_records), 6),
+        "location_lon": np.round(location_lon + rng.normal(0, 0.02, num_records), 6),
+        "location_name": location_names[location_idx],
+        "violation_type": np.array(VIOLATION_TYPES, dtype=object)[violation_idx],
+        "driver_profile": np.where(is_risky, "risky", "safe").astype(object),
+    }, columns=COLUMNS)
+    
+    order = np.argsort(timestamps, kind="stable")
+    return df.take(order).reset_index(drop=True)
+
+
+def iter_dummy_data(num_records, chunk_size=1_000_000, seed=42, num_drivers=None):
+    """
+    Generate dummy driving data as a stream of bounded-size DataFrames
+    
+    Memory stays flat at any record count. Each chunk is sorted by date
+    on its own; the stream as a whole is not. Drivers span all chunks, but
+    trip ids are only sessionized within a chunk (run sessionize on the
+    combined logs for trips that cross chunks).
+    
+    Args:
+        num_records (int): Total number of driving records
+        chunk_size (int): Maximum number of records per chunk
+        seed (int): Seed for the shared random generator
+        num_drivers (int): Number of distinct drivers (default: one per
+            RECORDS_PER_DRIVER records)
+        
+    Yields:
+        pd.DataFrame: Chunk of driving logs
+    """
+    if num_drivers is None:
+        num_drivers = max(1, num_records // RECORDS_PER_DRIVER)
+    rng = np.random.default_rng(seed)
+    trip_offset = 0
+    for start in range(0, num_records, chunk_size):
+        chunk = sessionize(_generate_vectorized(min(chunk_size, num_records - start), rng, num_drivers))
+        # Keep trip ids unique across the stream
+        chunk["trip_id"] += trip_offset
+        trip_offset = int(chunk["trip_id"].max()) + 1
+        yield chunk
+
+
+def to_compact(df):
+    """
+    Convert driving logs to the compact in-memory schema
+    
+    Flags become int8, speeds and coordinates float32, dates datetime64 and
+    the repeated Arabic strings categoricals. Known locations, violations and
+    profiles keep fixed category codes ("لا يوجد" is always code 0); values
+    outside those lists are appended as extra categories.
+    
+    Args:
+        df (pd.DataFrame): Driving logs in any schema
+        
+    Returns:
+        pd.DataFrame: Driving logs with compact dtypes
+    """
+    known_categories = {
+        "location_name": [loc["name"] for loc in RIYADH_LOCATIONS],
+        "violation_type": VIOLATION_TYPES,
+        "driver_profile": DRIVER_PROFILES,
+    }
+    
+    df = df.astype({column: dtype for column, dtype in COMPACT_DTYPES.items() if column in df.columns})
+    for column in ("date", "timestamp"):
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column]).astype("datetime64[ms]")
+    
+    for column, known in known_categories.items():
+        if column in df.columns:
+            observed = df[column].dropna().unique()
+            extra = sorted(set(observed) - set(known))
+            df[column] = pd.Categorical(df[column], categories=known + extra)
     
     return df
 
 
+def load_driving_data(source="driving_data.csv", columns=None):
+    """
+    Load driving logs from a CSV file or a LogStore directory in the compact schema
+    
+    Args:
+        source (str): CSV file path or LogStore directory
+        columns (list): Columns to load (default: all)
+        
+    Returns:
+        pd.DataFrame: Driving logs with compact dtypes
+    """
+    if os.path.isdir(source):
+        from storage import LogStore
+        df = LogStore(source).read(columns=columns)
+    else:
+        dtypes = {column: "category" if dtype == "category" else dtype
+                  for column, dtype in COMPACT_DTYPES.items()}
+        df = pd.read_csv(source, encoding="utf-8-sig", usecols=columns, dtype=dtypes)
+    
+    return to_compact(df)
+
+
 def save_dummy_data(filename="driving_data.csv"):
     """
     Generate and save dummy data to CSV file